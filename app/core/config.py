@@ -1,6 +1,9 @@
+from typing import Literal
 from urllib import parse
 
-from pydantic import BaseSettings, SecretStr, Field
+from pydantic import BaseModel, BaseSettings, SecretStr, Field
+
+from core.constants import COUNT_STRATEGY
 
 
 class Settings(BaseSettings):
@@ -27,6 +30,21 @@ class Token(Settings):
     alive_hours: int = 4
     refresh_alive_hours: int = 24 * 7
     secret: str = 'some_secret_word'
+    algorithm: str = Field(default='HS256', description='Алгоритм подписи токенов (HS256, RS256, EdDSA)')
+    keys_dir: str | None = Field(
+        default=None,
+        description='Директория с приватными ключами подписи в формате <kid>.pem (для RS256 и EdDSA)'
+    )
+    active_kid: str | None = Field(
+        default=None,
+        description='Идентификатор ключа для подписи новых токенов (по умолчанию - последний по имени файла)'
+    )
+    cache_size: int = Field(default=10000, description='Размер кэша проверенных токенов (0 - кэш отключен)')
+    cache_ttl: int = Field(default=60, description='Время жизни записи в кэше проверенных токенов (сек.)')
+    strict_claims: bool = Field(
+        default=False,
+        description='Проверять данные токенов pydantic схемами (медленнее, для отладки формата токенов)'
+    )
 
     class Config(Settings.Config):
         env_prefix = 'TOKEN_'
@@ -35,20 +53,110 @@ class Token(Settings):
 class Redis(Settings):
     host: str = '127.0.0.1'
     port: int = 6379
-    pool_minsize: int = 10
-    pool_maxsize: int = 20
+    cluster_enable: bool = Field(
+        default=False,
+        description='Подключаться к Redis Cluster (host и port - любой из узлов кластера)'
+    )
+    pool_minsize: int = Field(default=10, description='Количество соединений, открываемых при старте процесса')
+    pool_maxsize: int = Field(
+        default=20,
+        description='Максимальное количество соединений в процессе (одно постоянно занято подпиской фильтра блоклиста)'
+    )
+    pool_timeout: float = Field(default=1, description='Максимальное время ожидания свободного соединения (сек.)')
+    socket_timeout: float = Field(default=2, description='Таймаут операций с Redis (сек.)')
+    socket_connect_timeout: float = Field(default=1, description='Таймаут подключения к Redis (сек.)')
+    health_check_interval: int = Field(default=30, description='Период проверки простаивающих соединений (сек.)')
+    call_timeout: float = Field(
+        default=0.25,
+        description='Максимальная длительность одного обращения к Redis (сек.), дольше - обращение неудачное'
+    )
+    breaker_failure_threshold: int = Field(
+        default=5,
+        description='Количество неудачных обращений к Redis подряд, после которого обращения временно прекращаются'
+    )
+    breaker_recovery_time: float = Field(
+        default=5,
+        description='Время, в течение которого обращения к Redis не выполняются после серии ошибок (сек.)'
+    )
+    client_cache_enable: bool = Field(
+        default=False,
+        description='Кэшировать чтения в памяти воркера с инвалидацией через CLIENT TRACKING (Redis 6+, не в кластере)'
+    )
+    client_cache_size: int = Field(default=10000, description='Максимальное количество ключей в локальном кэше')
+    client_cache_ttl: float = Field(
+        default=60,
+        description='Максимальное время хранения значения в локальном кэше (сек.)'
+    )
+    client_cache_pool_size: int = Field(
+        default=4,
+        description='Количество соединений для чтений через локальный кэш (сверх основного пула)'
+    )
     password: str | None = None
 
     class Config(Settings.Config):
         env_prefix = 'REDIS_'
 
 
+class Blocklist(Settings):
+    epoch_cache_ttl: int = Field(
+        default=600,
+        description='Время хранения в Redis признака отсутствия отзыва токенов у пользователя (сек.)'
+    )
+    filter_enable: bool = Field(
+        default=True,
+        description='Проверять токены по локальному Bloom-фильтру перед обращением в Redis'
+    )
+    filter_capacity: int = Field(default=1_000_000, description='Ожидаемое количество заблокированных токенов')
+    filter_error_rate: float = Field(
+        default=0.001,
+        description='Доля ложных срабатываний фильтра (проверок, уходящих в Redis без необходимости)'
+    )
+    filter_snapshot_interval: int = Field(
+        default=300,
+        description='Период полной синхронизации фильтра с Redis (сек.)'
+    )
+    fail_open: bool = Field(
+        default=False,
+        description='При недоступности Redis считать токены незаблокированными (иначе - заблокированными)'
+    )
+
+    class Config(Settings.Config):
+        env_prefix = 'BLOCKLIST_'
+
+
 class Database(Settings):
     name: str
     user: str
     password: str
     host: str = '127.0.0.1'
     port: int = 5432
+    pool_size: int = Field(default=5, description='Количество постоянных соединений с БД в процессе')
+    max_overflow: int = Field(
+        default=10,
+        description='Количество соединений сверх pool_size, открываемых при пиковой нагрузке'
+    )
+    pool_timeout: float = Field(default=30, description='Максимальное время ожидания свободного соединения (сек.)')
+    pool_pre_ping: bool = Field(
+        default=False,
+        description='Проверять соединение перед выдачей из пула (лишний запрос, но без ошибок на разорванных)'
+    )
+    pool_recycle: int = Field(
+        default=-1,
+        description='Время жизни соединения (сек.), после которого оно переоткрывается; -1 - без ограничения'
+    )
+    statement_timeout: int | None = Field(
+        default=None,
+        description='Максимальная длительность запроса на стороне PostgreSQL (мс)'
+    )
+    replica_dsns: list[str] = Field(
+        default=[],
+        description='Строки подключения к репликам для запросов только на чтение (JSON-список)'
+    )
+    replica_max_lag: float | None = Field(
+        default=None,
+        description='Максимальное отставание реплики (сек.), при превышении чтение идёт с основного сервера'
+    )
+    replica_lag_check_interval: float = Field(default=5, description='Период проверки отставания реплик (сек.)')
 
     @property
     def connection_string(self) -> str:
@@ -58,6 +166,21 @@ class Database(Settings):
         env_prefix = 'DB_'
 
 
+class Pagination(Settings):
+    count_strategy: COUNT_STRATEGY = Field(
+        default=COUNT_STRATEGY.exact,
+        description='Способ подсчёта количества записей в списках по умолчанию'
+    )
+    count_cache_ttl: int = Field(default=30, description='Время хранения количества записей в Redis (сек.)')
+    count_estimate_threshold: int = Field(
+        default=10000,
+        description='Оценка количества записей, ниже которой записи пересчитываются точно'
+    )
+
+    class Config(Settings.Config):
+        env_prefix = 'PAGINATION_'
+
+
 class Logger(Settings):
     log_level: str = 'DEBUG'
     force: bool = True
@@ -67,8 +190,45 @@ class Logger(Settings):
         env_prefix = 'LOG_'
 
 
+class RateLimitRule(BaseModel):
+    """
+    Правило ограничения количества запросов к роуту
+    """
+    algorithm: Literal['fixed_window', 'sliding_window', 'gcra'] = 'fixed_window'
+    limit: int = Field(..., gt=0, description='Количество запросов за период')
+    period: int = Field(default=60, gt=0, description='Период (сек.)')
+    key: Literal['user', 'ip', 'client'] = Field(
+        default='user',
+        description='По какому признаку считаются запросы: пользователь, IP адрес или клиент (X-Client-Id)'
+    )
+    burst: int | None = Field(default=None, gt=0, description='Допустимый всплеск запросов (для gcra)')
+    local_share: float | None = Field(
+        default=None,
+        gt=0,
+        le=1,
+        description='Доля остатка лимита, резервируемая воркером для локального учёта без обращения в Redis '
+                    '(для роутов с высокой нагрузкой)'
+    )
+
+
 class Limiter(Settings):
     rate_limit_per_minute: int = 5
+    algorithm: Literal['fixed_window', 'sliding_window', 'gcra'] = Field(
+        default='fixed_window',
+        description='Алгоритм ограничения для роутов без собственных правил'
+    )
+    routes: dict[str, list[RateLimitRule]] = Field(
+        default={},
+        description='Правила для роутов в формате JSON, ключ - endpoint (например, "auth.validate_jwt_token")'
+    )
+    lease_ttl: float = Field(
+        default=1,
+        description='Максимальное время жизни запросов, зарезервированных воркером (сек.)'
+    )
+    fail_open: bool = Field(
+        default=True,
+        description='При недоступности Redis пропускать запросы (иначе - отклонять)'
+    )
 
     class Config(Settings.Config):
         env_prefix = 'RATE_'
@@ -100,6 +260,14 @@ class OAuthClient(Settings):
 class Captcha(Settings):
     max_count: int = Field(default=1, description='Максимальное количество попыток на решение одной каптчи')
     blocking_time: int = Field(default=60, description='Блокировка пользователя по времени (сек.)')
+    blocked_cache_ttl: float = Field(
+        default=2,
+        description='Время, на которое воркер запоминает, что IP адресу не нужно решать каптчу (сек.)'
+    )
+    fail_open: bool = Field(
+        default=True,
+        description='При недоступности Redis не требовать решения каптчи (иначе - требовать от всех)'
+    )
 
     class Config(Settings.Config):
         env_prefix = 'CAPTCHA_'
@@ -108,8 +276,10 @@ class Captcha(Settings):
 class Envs(Settings):
     app: Application = Application()
     db: Database = Database()
+    pagination: Pagination = Pagination()
     redis: Redis = Redis()
     token: Token = Token()
+    blocklist: Blocklist = Blocklist()
     logger: Logger = Logger()
     limiter: Limiter = Limiter()
     oauth: OAuthClient = OAuthClient()
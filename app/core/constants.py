@@ -7,6 +7,17 @@ class ROLES(str, enum.Enum):
     administrator = '397427ed-b15a-4e29-8170-c7e941817201'
 
 
+class COUNT_STRATEGY(str, enum.Enum):
+    """
+    Способ подсчёта количества записей в списках
+    """
+    exact = 'exact'
+    estimated = 'estimated'
+    cached = 'cached'
+
+
 REQUEST_HEADER_ID = 'X-Request-Id'
 
+CLIENT_ID_HEADER = 'X-Client-Id'
+
 IP_HEADER_PARAM = 'HTTP_X_FORWARDED_FOR'
@@ -22,6 +22,7 @@ class ExceptionMessages:
 
     incorrect_data = ExceptionTextElement(message='Неверный логин или пароль')
     incorrect_token = ExceptionTextElement(message='Неверный токен авторизации')
+    incorrect_cursor = ExceptionTextElement(message='Неверный курсор страницы')
     expired_token = ExceptionTextElement(
         message='Ваш токен более недействителен, пожалуйста авторизуйтесь снова'
     )
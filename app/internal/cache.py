@@ -1,10 +1,97 @@
 from redis.client import Redis
+from redis.cluster import RedisCluster
 
 from core.config import envs
+from models import User
+from schemas.auth import timestamp_to_unix
 from services.blocked_jwt import BlockedJWTStorage
 from services.cache import RedisCache
+from services.circuit_breaker import CircuitBreaker
+from services.client_cache import ClientSideCache
+from services.jwt_generator import JWTGenerator
+from services.redis_pool import InstrumentedConnectionPool, create_redis_pool
+from services.revocation_filter import RevocationFilter
+from services.row_counter import RowCounter
+from utils.db import db_session_manager
 
-redis = Redis(host=envs.redis.host, port=envs.redis.port, password=envs.redis.password)
-redis_cache = RedisCache(redis)
+redis: Redis | RedisCluster
+redis_pool: InstrumentedConnectionPool | None = None
+client_cache: ClientSideCache | None = None
 
-blocked_jwt_storage = BlockedJWTStorage(redis_cache, envs.token.refresh_alive_hours)
+if envs.redis.cluster_enable:
+    # у каждого узла кластера собственный пул соединений (до pool_maxsize соединений)
+    redis = RedisCluster(
+        host=envs.redis.host,
+        port=envs.redis.port,
+        password=envs.redis.password,
+        max_connections=envs.redis.pool_maxsize,
+        socket_timeout=envs.redis.socket_timeout,
+        socket_connect_timeout=envs.redis.socket_connect_timeout,
+        health_check_interval=envs.redis.health_check_interval
+    )
+else:
+    redis_pool = create_redis_pool(
+        host=envs.redis.host,
+        port=envs.redis.port,
+        password=envs.redis.password,
+        min_size=envs.redis.pool_minsize,
+        max_size=envs.redis.pool_maxsize,
+        timeout=envs.redis.pool_timeout,
+        socket_timeout=envs.redis.socket_timeout,
+        socket_connect_timeout=envs.redis.socket_connect_timeout,
+        health_check_interval=envs.redis.health_check_interval
+    )
+    redis = Redis(connection_pool=redis_pool)
+
+    if envs.redis.client_cache_enable:
+        client_cache = ClientSideCache(
+            redis_pool,
+            max_size=envs.redis.client_cache_size,
+            ttl=envs.redis.client_cache_ttl,
+            pool_size=envs.redis.client_cache_pool_size,
+            pool_timeout=envs.redis.pool_timeout
+        )
+
+redis_breaker = CircuitBreaker(
+    deadline=envs.redis.call_timeout,
+    failure_threshold=envs.redis.breaker_failure_threshold,
+    recovery_time=envs.redis.breaker_recovery_time
+)
+redis_cache = RedisCache(redis, local_cache=client_cache, breaker=redis_breaker)
+
+row_counter = RowCounter(
+    redis_cache,
+    cache_ttl=envs.pagination.count_cache_ttl,
+    estimate_threshold=envs.pagination.count_estimate_threshold
+)
+
+
+def load_tokens_revoked_at(user_id: str) -> float | None:
+    """
+    Получение эпохи отзыва токенов пользователя из БД
+    """
+    with db_session_manager() as session:
+        revoked_at = session.scalar(session.query(User.tokens_revoked_at).where(User.id == user_id))
+
+    return timestamp_to_unix(revoked_at) if revoked_at else None
+
+
+revocation_filter = RevocationFilter(
+    redis_cache,
+    key_prefix='blocked_jwt:',
+    epoch_key_prefix='revoked_before:',
+    capacity=envs.blocklist.filter_capacity,
+    error_rate=envs.blocklist.filter_error_rate,
+    snapshot_interval=envs.blocklist.filter_snapshot_interval
+) if envs.blocklist.filter_enable else None
+
+blocked_jwt_storage = BlockedJWTStorage(
+    redis_cache,
+    int(JWTGenerator.REFRESH_TOKEN_ALIVE_HOURS.total_seconds()),
+    token_cache=JWTGenerator.token_cache,
+    epoch_loader=load_tokens_revoked_at,
+    epoch_cache_ttl=envs.blocklist.epoch_cache_ttl,
+    revocation_filter=revocation_filter,
+    fail_open=envs.blocklist.fail_open,
+    hash_tags=envs.redis.cluster_enable
+)
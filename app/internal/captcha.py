@@ -1,8 +1,11 @@
 import random
 from typing import TypeVar, Protocol, Any
 
+from redis.exceptions import RedisError
+
 from core.config import envs
 from internal.cache import redis_cache
+from services.blocked_addresses import BlockedAddressCache
 from services.cache import RedisCache
 
 Number = TypeVar('Number', int, float)
@@ -44,27 +47,61 @@ class MathCaptcha(Captcha):
 
 
 class CaptchaService:
-    def __init__(self, captcha: Captcha, cache: RedisCache, max_count: int = 1, blocking_time: int = 60):
+    def __init__(
+            self,
+            captcha: Captcha,
+            cache: RedisCache,
+            max_count: int = 1,
+            blocking_time: int = 60,
+            blocked_cache: BlockedAddressCache | None = None,
+            key_prefix: str = 'captcha:',
+            fail_open: bool = True,
+    ):
         self.captcha = captcha
         self.cache = cache
         self.max_count = max_count
         self.blocking_time = blocking_time
+        self.blocked_cache = blocked_cache
+        self.key_prefix = key_prefix
+        self.fail_open = fail_open
+
+    def _key(self, key: str) -> str:
+        return f'{self.key_prefix}{key}'
+
+    def is_blocked(self, key: str) -> bool:
+        """
+        Требуется ли решить каптчу (по умолчанию проверяется локальный кэш, а не хранилище).
+
+        При недоступности хранилища результат определяется ``fail_open``
+        """
+        key = self._key(key)
+        try:
+            if self.blocked_cache is not None:
+                return self.blocked_cache.is_blocked(key)
+
+            return self.cache.have(key)
+        except RedisError:
+            return not self.fail_open
 
     def generate_problem(self, key: str) -> str:
         """
         Генерация проблемы и запись ответа в кэш под переданным ключом
         """
         problem, result = self.captcha.generate()
+        key = self._key(key)
 
         self.cache.add(key=key, value=str(result), ttl=self.blocking_time)
 
+        if self.blocked_cache is not None:
+            self.blocked_cache.block(key, self.blocking_time)
+
         return problem
 
     def check_value(self, key: str, value: str) -> bool:
         """
         Проверка полученном от пользователя ответа с тем, что лежит в кэше
         """
-        result = self.cache.get(key)
+        result = self.cache.get(self._key(key))
 
         if result is None:
             return True
@@ -75,8 +112,12 @@ class CaptchaService:
         return True
 
     def unblock(self, key: str) -> str:
+        key = self._key(key)
         value = self.cache.pop(key)
 
+        if self.blocked_cache is not None:
+            self.blocked_cache.unblock(key)
+
         return value
 
 
@@ -84,5 +125,7 @@ captcha_service = CaptchaService(
     captcha=MathCaptcha(),
     cache=redis_cache,
     max_count=envs.captcha.max_count,
-    blocking_time=envs.captcha.blocking_time
+    blocking_time=envs.captcha.blocking_time,
+    blocked_cache=BlockedAddressCache(redis_cache, negative_ttl=envs.captcha.blocked_cache_ttl),
+    fail_open=envs.captcha.fail_open
 )
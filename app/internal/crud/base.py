@@ -9,8 +9,10 @@ import pydantic
 from sqlalchemy.orm import Session, Query
 from sqlalchemy.orm.strategy_options import loader_option
 
-from internal.crud.utils import retrieve_object, pagination
+from core.constants import COUNT_STRATEGY
+from internal.crud.utils import retrieve_object, pagination, keyset_pagination, Count, Cursor
 from models import Base
+from services.row_counter import RowCounter
 
 ModelType: Base = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType", bound=pydantic.BaseModel)
@@ -177,6 +179,24 @@ class CRUDPaginated(CRUDBase):
     Пагинация в выдаче CRUD'a
     """
 
+    def __init__(
+            self,
+            model: Type[ModelType],
+            get_options: list[loader_option] = None,
+            get_multi_options: list[loader_option] = None,
+            row_counter: RowCounter | None = None,
+    ):
+        """
+        CRUD обёртка со стандартными методами и пагинацией
+
+        :param model: sqlalchemy модель
+        :param get_options: опции при запросах единичной модели
+        :param get_multi_options: опции при запросах списка
+        :param row_counter: подсчёт количества записей списка (без него количество считается точно)
+        """
+        super().__init__(model, get_options, get_multi_options)
+        self.row_counter = row_counter
+
     def get_multi(
             self,
             session: Session,
@@ -184,21 +204,59 @@ class CRUDPaginated(CRUDBase):
             rows_per_page: int = 100,
             with_count: bool = True,
             with_deleted: bool = False,
-            query: Query | None = None
-    ) -> tuple[list[ModelType], int | None]:
+            query: Query | None = None,
+            count_strategy: COUNT_STRATEGY = COUNT_STRATEGY.exact
+    ) -> tuple[list[ModelType], Count | None]:
         """
         Получение списка объектов установленного типа c пагинацией
         :param session: сессия бд
         :param page: страница с отсчётом от 1
         :param rows_per_page: кол-во записей
+        :param with_count: подсчитывать количество записей
+        :param with_deleted: включать удалённые записи
         :param query: кастомный запрос
-        :return: результирующий список объектов и их кол-во
+        :param count_strategy: способ подсчёта количества записей
+        :return: результирующий список объектов и их кол-во (со способом подсчёта)
         """
         if query is None:
             query = session.query(self.model)
 
         query = query.options(*self.get_multi_options)
 
-        values, count = pagination(query, page, rows_per_page)
+        values, count = pagination(
+            query,
+            page,
+            rows_per_page,
+            with_count=with_count,
+            with_deleted=with_deleted,
+            count_strategy=count_strategy,
+            row_counter=self.row_counter
+        )
 
         return values, count
+
+    def get_multi_by_cursor(
+            self,
+            session: Session,
+            cursor: Cursor | None = None,
+            rows_per_page: int = 100,
+            query: Query | None = None
+    ) -> tuple[list[ModelType], Cursor | None]:
+        """
+        Получение списка объектов установленного типа c пагинацией по курсору (от новых к старым, без подсчёта
+        общего количества)
+        :param session: сессия бд
+        :param cursor: курсор следующей страницы из предыдущей выдачи, для первой страницы - пустой
+        :param rows_per_page: кол-во записей
+        :param query: кастомный запрос
+        :raises LogicException: при некорректном курсоре
+        :return: результирующий список объектов и курсор следующей страницы
+        """
+        if query is None:
+            query = session.query(self.model)
+
+        query = query.options(*self.get_multi_options)
+
+        values, next_cursor = keyset_pagination(query, cursor, rows_per_page, self.model)
+
+        return values, next_cursor
@@ -1,10 +1,18 @@
+import base64
+import binascii
+import datetime
+import json
 from typing import Type, TypeVar, Collection, Iterable
 from uuid import UUID
 
-from core.exceptions.exceptions import generate_entity_not_exists_exception, ObjectNotExists
+from core.constants import COUNT_STRATEGY
+from core.exceptions.default_messages import ExceptionMessages
+from core.exceptions.exceptions import generate_entity_not_exists_exception, ObjectNotExists, LogicException
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Query
 
 from models import Base
+from services.row_counter import RowCounter, RowsCount
 
 RetrieveType = TypeVar('RetrieveType')
 
@@ -60,7 +68,8 @@ def retrieve_batch(
 
 
 SearchType = TypeVar('SearchType')
-Count = int
+Count = RowsCount
+Cursor = str
 
 
 def pagination(
@@ -70,8 +79,10 @@ def pagination(
         ModelClass: Type[SearchType] = Base,
         with_count: bool = True,
         with_deleted: bool = False,
-        hide_deleted: bool = False
-) -> tuple[list[SearchType], Count]:
+        hide_deleted: bool = False,
+        count_strategy: COUNT_STRATEGY = COUNT_STRATEGY.exact,
+        row_counter: RowCounter | None = None
+) -> tuple[list[SearchType], Count | None]:
     """
     Выполняет запрос с пагинацией.
 
@@ -81,7 +92,9 @@ def pagination(
     :param rows_per_page: кол-во элементов на 1 странице выдачи
     :param hide_deleted: параметр явно фильтрующий по deleted_at
     :param ModelClass: класс для возвращаемых значений. Нужен для typehints
-    :return: Список значений и предельное их кол-во
+    :param count_strategy: способ подсчёта количества записей
+    :param row_counter: подсчёт количества записей (без него количество считается точно)
+    :return: Список значений и предельное их кол-во (со способом подсчёта)
     """
     if with_deleted:
         query = query.execution_options(include_deleted=True)
@@ -90,7 +103,12 @@ def pagination(
         # noinspection PyComparisonWithNone
         query = query.filter(ModelClass.deleted_at == None)
 
-    rows_number = query.count() if with_count else None
+    rows_number = None
+    if with_count:
+        rows_number = (
+            row_counter.count(query, count_strategy) if row_counter is not None
+            else RowsCount(query.count(), COUNT_STRATEGY.exact)
+        )
 
     if rows_per_page:
         query = query.limit(rows_per_page)
@@ -99,6 +117,64 @@ def pagination(
     return final_query.all(), rows_number
 
 
+def keyset_pagination(
+        query: Query,
+        cursor: Cursor | None = None,
+        rows_per_page: int | None = 25,
+        ModelClass: Type[SearchType] = Base
+) -> tuple[list[SearchType], Cursor | None]:
+    """
+    Выполняет запрос с пагинацией по курсору: записи от новых к старым по (created_at, id).
+
+    В отличие от ``pagination`` не считает общее количество записей и не перебирает записи предыдущих страниц:
+    при индексе по (created_at, id) (с учётом фильтров запроса) любая страница - поиск по индексу
+    и чтение ``rows_per_page`` записей. Записи без created_at (не имеющие позиции в порядке выдачи) не выдаются
+    :param query: запрос по которому будет выполнен запрос
+    :param cursor: курсор следующей страницы из предыдущей выдачи, для первой страницы - пустой
+    :param rows_per_page: кол-во элементов на 1 странице выдачи
+    :param ModelClass: класс для возвращаемых значений (с полями created_at и id)
+    :raises LogicException: при некорректном курсоре
+    :return: Список значений и курсор следующей страницы (None для последней страницы)
+    """
+    order = (ModelClass.created_at, ModelClass.id)
+    query = query.filter(ModelClass.created_at.isnot(None))
+    if cursor:
+        query = query.filter(tuple_(*order) < decode_cursor(cursor))
+
+    query = query.order_by(*(column.desc() for column in order))
+    if not rows_per_page:
+        return query.all(), None
+
+    # лишняя запись показывает, есть ли следующая страница
+    objects = query.limit(rows_per_page + 1).all()
+    if len(objects) <= rows_per_page:
+        return objects, None
+
+    last = objects[rows_per_page - 1]
+    return objects[:rows_per_page], encode_cursor(last.created_at, last.id)
+
+
+def encode_cursor(created_at: datetime.datetime, id: ID) -> Cursor:
+    """
+    Непрозрачный для клиента курсор страницы по значениям (created_at, id) последней записи
+    """
+    data = json.dumps([created_at.isoformat(), str(id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Cursor) -> tuple[datetime.datetime, str]:
+    """
+    Значения (created_at, id) последней записи предыдущей страницы
+
+    :raises LogicException: при некорректном курсоре
+    """
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.datetime.fromisoformat(created_at), str(UUID(id))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError, AttributeError):
+        raise LogicException(ExceptionMessages.incorrect_cursor())
+
+
 def check_missing_entities(ids: Iterable[str], objects: list[Base], model: Base):
     """
     Проверка на наличие несуществующих записей бд между запрашиваемыми идентификаторами и данными из БД
@@ -1,15 +1,18 @@
+import datetime
 from uuid import UUID
 
 from pyotp import TOTP, random_base32
-from sqlalchemy import or_
-from sqlalchemy.orm import joinedload, Session
+from sqlalchemy import event, func, or_, select, union_all
+from sqlalchemy.orm import aliased, joinedload, Session
 
 from core.config import envs
 from core.exceptions.default_messages import ExceptionMessages
 from core.exceptions.exceptions import ObjectAlreadyExists, LogicException
+from internal.cache import blocked_jwt_storage, row_counter
 from internal.crud.base import CRUDPaginated
 from internal.crud.utils import retrieve_object
-from models import User, UserLoginHistory, UserSocialAccount
+from models import Role, User, UserLoginHistory, UserSocialAccount
+from schemas.auth import timestamp_to_unix
 from schemas.core import GetMultiQueryParam
 from schemas.login_history import UserLoginHistoryBare
 from services.cache import RedisCache
@@ -19,15 +22,17 @@ class UserCrud(CRUDPaginated):
     pass
 
 
-user_crud = UserCrud(model=User, get_options=[joinedload(User.role)])
+user_crud = UserCrud(model=User, get_options=[joinedload(User.role)], row_counter=row_counter)
 
-user_login_history_crud = CRUDPaginated(model=UserLoginHistory)
+user_login_history_crud = CRUDPaginated(model=UserLoginHistory, row_counter=row_counter)
 
 user_social_account_crud = CRUDPaginated(
     model=UserSocialAccount,
     get_options=[joinedload(UserSocialAccount.user)]
 )
 
+TWO_AUTH_KEY_PREFIX = 'totp:'
+
 
 def check_credentials(session: Session, login: str, email: str, exclude_user_id: UUID | None = None):
     """
@@ -48,45 +53,118 @@ def check_credentials(session: Session, login: str, email: str, exclude_user_id:
         raise ObjectAlreadyExists()
 
 
+def find_user_by_login(session: Session, login: str) -> User | None:
+    """
+    Поиск пользователя (с ролью и её разрешениями) по логину или почте без учёта регистра.
+
+    Логин и почта ищутся отдельными ветками ``UNION ALL``, каждая - по своему индексу выражения
+    (``ix_users_lower_login``, ``ix_users_lower_email``), а не одним условием ``OR`` по всей таблице.
+    Из нескольких найденных пользователей первым выдаётся неудалённый
+
+    :param session: сессия бд
+    :param login: логин или почта пользователя
+    """
+    found_users = union_all(
+        select(User).where(func.lower(User.login) == func.lower(login)),
+        select(User).where(func.lower(User.email) == func.lower(login)),
+    ).subquery()
+    user = aliased(User, found_users)
+
+    query = session.query(user).options(joinedload(user.role).selectinload(Role.permissions)).order_by(
+        user.deleted_at.desc()
+    )
+
+    return query.first()
+
+
+def revoke_user_tokens(session: Session, user: User):
+    """
+    Отзыв всех выпущенных на текущий момент токенов пользователя (выход со всех устройств).
+
+    Эпоха отзыва публикуется в кэш после фиксации транзакции (до неё параллельный запрос прочитал бы
+    из БД прежнее значение и сохранил его в кэш), при откате транзакции - не публикуется
+
+    :param session: сессия бд
+    :param user: пользователь
+    """
+    revoked_at = datetime.datetime.utcnow()
+
+    user.tokens_revoked_at = revoked_at
+    session.flush()
+
+    user_id = str(user.id)
+
+    @event.listens_for(session, 'after_commit', once=True)
+    def publish_epoch(_: Session):
+        blocked_jwt_storage.revoke_user(user_id, timestamp_to_unix(revoked_at))
+
+    @event.listens_for(session, 'after_rollback', once=True)
+    def discard_epoch(_: Session):
+        event.remove(session, 'after_commit', publish_epoch)
+
+
 def get_login_history(
         session: Session,
         user_id: UUID,
         query_params: GetMultiQueryParam
-) -> list[UserLoginHistoryBare]:
+) -> tuple[list[UserLoginHistoryBare], str | None]:
     """
     Получение истории посещений пользователя
 
     :param session: SQLAlchemy сессия
     :param user_id: идентификатор пользователя
     :param query_params: параметры пагинации
+    :return: история посещений и курсор следующей страницы (при пагинации по курсору)
     """
     retrieve_object(session.query(User), User, user_id)
 
     query = session.query(UserLoginHistory).where(UserLoginHistory.user_id == user_id)
-    login_history, count = user_login_history_crud.get_multi(
-        session,
-        query=query,
-        page=query_params.page,
-        rows_per_page=query_params.rows_per_page
-    )
+    next_cursor = None
+    if query_params.cursor is not None:
+        login_history, next_cursor = user_login_history_crud.get_multi_by_cursor(
+            session,
+            cursor=query_params.cursor,
+            rows_per_page=query_params.rows_per_page,
+            query=query
+        )
+    else:
+        # количество записей в выдаче истории не используется
+        login_history, _ = user_login_history_crud.get_multi(
+            session,
+            query=query,
+            page=query_params.page,
+            rows_per_page=query_params.rows_per_page,
+            with_count=False
+        )
 
     result = [UserLoginHistoryBare.from_orm(i) for i in login_history]
 
-    return result
+    return result, next_cursor
+
+
+def get_two_auth_secret(cache: RedisCache, user_id: UUID) -> str | None:
+    """
+    Секрет двухфакторной аутентификации пользователя.
+
+    До введения префикса секреты хранились под идентификатором пользователя без префикса
+    """
+    secret, legacy_secret = cache.get_many([f'{TWO_AUTH_KEY_PREFIX}{user_id}', str(user_id)])
+
+    return secret if secret is not None else legacy_secret
 
 
 def connect_two_auth_link(session: Session, cache: RedisCache, user_id: UUID) -> str:
     secret = random_base32()
     totp = TOTP(secret)
-    user_key = str(user_id)
 
     user = user_crud.get(session, user_id)
-    user_secret = cache.get(user_key)
 
-    if user.is_use_additional_auth and user_secret:
+    # секрет в кэше проверяется, только если у пользователя уже подключена двухфакторная аутентификация
+    if user.is_use_additional_auth and get_two_auth_secret(cache, user_id) is not None:
         raise LogicException(ExceptionMessages.two_auth_already_exists())
 
-    cache.add(user_key, secret)
+    cache.add(f'{TWO_AUTH_KEY_PREFIX}{user_id}', secret)
+    cache.delete([str(user_id)])
 
     provisioning_url = totp.provisioning_uri(name=str(user.id), issuer_name=envs.app.name)
 
@@ -94,7 +172,7 @@ def connect_two_auth_link(session: Session, cache: RedisCache, user_id: UUID) ->
 
 
 def check_connect_two_auth_link(code: str, cache: RedisCache, user: User) -> bool:
-    secret = cache.get(str(user.id))
+    secret = get_two_auth_secret(cache, user.id)
     totp = TOTP(secret)
 
     if not totp.verify(code):
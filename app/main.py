@@ -1,3 +1,4 @@
+import pathlib
 from http import HTTPStatus
 from json import JSONEncoder
 from uuid import UUID
@@ -13,18 +14,24 @@ from core.exceptions.exceptions import LogicException, NotAuthorized, ObjectAlre
     NoPermissionException
 from core.swagger import api
 from core.tracer import configure_tracer
-from internal.cache import redis_cache
+from internal.cache import blocked_jwt_storage, client_cache, revocation_filter
+from internal.captcha import captcha_service
 from internal.users import user_crud
 from models import User
 from routes.v1.auth import auth
 from routes.v1.captcha import captcha
+from routes.v1.metrics import metrics
 from routes.v1.oauth import oauth
 from routes.v1.roles import roles
 from routes.v1.users import users
+from routes.well_known import well_known
 from schemas.core import ErrorSchema
 from schemas.users import UserCreate
+from services.jwt_generator import JWTGenerator
+from services.jwt_keys import generate_private_key
 from utils.auth import get_ip_address_from_request
 from utils.db import db_session_manager
+from utils.rate_limit import add_rate_limit_headers, limiter
 
 old_default = JSONEncoder.default
 
@@ -40,11 +47,19 @@ JSONEncoder.default = new_default
 app = Flask(__name__)
 
 app.config['JWT_SECRET_KEY'] = envs.token.secret
+app.config['JWT_ALGORITHM'] = JWTGenerator.key_storage.signing_key.algorithm
+app.config['JWT_DECODE_ALGORITHMS'] = JWTGenerator.key_storage.algorithms
 app.config['JWT_TOKEN_LOCATION'] = 'headers'
 app.config['JWT_HEADER_NAME'] = 'Authorization'
 app.config['JWT_HEADER_TYPE'] = 'Bearer'
 jwt = JWTManager(app)
 
+
+@jwt.decode_key_loader
+def decode_key_loader(jwt_header: dict, jwt_data: dict):
+    return JWTGenerator.key_storage.get(jwt_header.get('kid')).public_key
+
+
 if envs.tracer.enable:
     configure_tracer(app, envs.tracer.host, envs.tracer.port)
 
@@ -53,6 +68,11 @@ app.register_blueprint(auth)
 app.register_blueprint(roles)
 app.register_blueprint(oauth)
 app.register_blueprint(captcha)
+app.register_blueprint(metrics)
+app.register_blueprint(well_known)
+
+limiter.check_routes(app.view_functions)
+app.after_request(add_rate_limit_headers)
 
 
 @app.errorhandler(LogicException)
@@ -83,17 +103,20 @@ def handle_error(e):
 @app.before_request
 def before_request():
     ip_addr = get_ip_address_from_request(request)
-    if redis_cache.get(ip_addr):
+    if captcha_service.is_blocked(ip_addr):
         endpoint = 'captcha.generate_captcha'
         if request.endpoint != endpoint:
             return redirect(url_for(endpoint, _method='GET'))
         return None
 
     request_id = request.headers.get(REQUEST_HEADER_ID)
-    if not request_id and not envs.app.debug:
+    if not request_id and not envs.app.debug and request.blueprint != well_known.name:
         raise RuntimeError(ExceptionMessages.request_id_necessary())
 
 
+app.before_request(limiter.limit_configured_routes)
+
+
 @click.command(name='create-superuser')
 @click.option('--login', prompt='Введите логин суперпользователя', help='Логин суперпользователя')
 @click.option('--password', prompt='Введите пароль суперпользователя', help='Пароль суперпользователя')
@@ -114,6 +137,63 @@ def create_user(login: str, password: str):
             user_crud.create(session, superuser)
 
 
+@click.command(name='generate-jwt-key')
+@click.option('--kid', prompt='Введите идентификатор ключа', help='Идентификатор ключа (kid)')
+def generate_jwt_key(kid: str):
+    """
+    Генерация нового ключа подписи JWT токенов для ротации.
+
+    Ключ сохраняется в директорию ``TOKEN_KEYS_DIR``; чтобы начать подписывать им токены,
+    необходимо указать его в ``TOKEN_ACTIVE_KID`` после того, как он опубликуется в JWKS всех инстансов
+    """
+    if not envs.token.keys_dir:
+        print('TOKEN_KEYS_DIR is not set')
+        return
+
+    path = pathlib.Path(envs.token.keys_dir) / f'{kid}.pem'
+    if path.exists():
+        print('Key with the same kid already exists! Try pass the another kid')
+        return
+
+    path.write_bytes(generate_private_key(envs.token.algorithm))
+    path.chmod(0o600)
+
+
+@click.command(name='blocklist-stats')
+@click.option('--batch-size', default=1000, help='Количество ключей, обрабатываемых за один запрос к Redis')
+def blocklist_stats(batch_size: int):
+    """
+    Количество заблокированных токенов и занимаемая ими память в Redis (для оценки необходимого объёма Redis)
+    """
+    stats = blocked_jwt_storage.stats(batch_size)
+
+    print(f'Blocked tokens: {stats["keys"]}')
+    print(f'Memory usage: {stats["memory_bytes"]} bytes (~{stats["avg_key_bytes"]} bytes per token)')
+
+
+@click.command(name='clear-blocklist')
+@click.option('--batch-size', default=1000, help='Количество ключей, удаляемых за один запрос к Redis')
+def clear_blocklist(batch_size: int):
+    """
+    Удаление всех заблокированных токенов и эпох отзыва из Redis (без блокировки Redis и без затрагивания
+    остальных данных)
+    """
+    deleted = blocked_jwt_storage.clear(batch_size)
+
+    print(f'Deleted keys: {deleted}')
+
+
+app.cli.add_command(create_user)
+app.cli.add_command(generate_jwt_key)
+app.cli.add_command(blocklist_stats)
+app.cli.add_command(clear_blocklist)
+
+
 if __name__ == '__main__':
     api.register(app)
+    if revocation_filter is not None:
+        revocation_filter.start()
+    if client_cache is not None:
+        client_cache.start()
+    captcha_service.blocked_cache.start()
     app.run(host='0.0.0.0', port=envs.app.port, debug=envs.app.debug)
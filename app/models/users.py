@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, String, Text, Boolean
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, Text, Boolean, func
 from sqlalchemy import UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.hybrid import hybrid_property
@@ -14,11 +14,15 @@ from utils.partitions import user_partition, social_accounts_partition
 class User(TimestampMixin, Base):
     __repr_name__ = 'Пользователь'
     __tablename__ = 'users'
-    __table_args__ = {
-        'schema': 'users',
-        'postgresql_partition_by': 'RANGE (created_at)',
-        'listeners': [('after_create', user_partition)],
-    }
+    __table_args__ = (
+        # пагинация по курсору (internal.crud.utils.keyset_pagination)
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+        {
+            'schema': 'users',
+            'postgresql_partition_by': 'RANGE (created_at)',
+            'listeners': [('after_create', user_partition)],
+        }
+    )
 
     id: str = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     role_id: str = Column(UUID(as_uuid=True), ForeignKey('roles.roles.id'), nullable=False)
@@ -32,6 +36,11 @@ class User(TimestampMixin, Base):
         server_default='false',
         comment='Использовать ли двухфакторную аутентификацию'
     )
+    tokens_revoked_at = Column(
+        DateTime,
+        nullable=True,
+        comment='Все токены пользователя, выпущенные до этого момента, недействительны'
+    )
 
     first_name: str = Column(Text, nullable=True)
     last_name: str = Column(Text, nullable=True)
@@ -44,10 +53,20 @@ class User(TimestampMixin, Base):
         return self.role.name
 
 
+# поиск пользователя при входе без учёта регистра (internal.users.find_user_by_login); уникальными индексы
+# секционированной таблицы без ключа секционирования быть не могут
+Index('ix_users_lower_login', func.lower(User.login))
+Index('ix_users_lower_email', func.lower(User.email))
+
+
 class UserLoginHistory(Base):
     __repr_name__ = 'История посещений пользователя'
     __tablename__ = 'user_login_histories'
-    __table_args__ = {'schema': 'users'}
+    __table_args__ = (
+        # пагинация истории посещений пользователя по курсору (internal.crud.utils.keyset_pagination)
+        Index('ix_user_login_histories_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        {'schema': 'users'}
+    )
 
     id: str = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: str = Column(
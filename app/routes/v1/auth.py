@@ -1,10 +1,8 @@
 import jwt
-from flask import Blueprint, request
+from flask import Blueprint
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from pydantic import ValidationError
 from spectree import Response
-from sqlalchemy import or_, func
-from sqlalchemy.orm import joinedload
 
 from core.constants import ROLES
 from core.exceptions.default_messages import ExceptionMessages
@@ -12,16 +10,20 @@ from core.exceptions.exceptions import NotAuthorized, NoPermissionException, Log
 from core.swagger import api
 from internal.cache import blocked_jwt_storage, redis_cache
 from internal.crud.utils import retrieve_object
-from internal.users import check_credentials, user_crud, check_connect_two_auth_link
-from models import User, Role, UserLoginHistory
+from internal.users import check_credentials, user_crud, check_connect_two_auth_link, revoke_user_tokens, \
+    find_user_by_login
+from models import User, UserLoginHistory
 from routes.core import responses
-from schemas.auth import LoginOut, UserInfo, RefreshTokenInfoOut, TokenIn, ChangePassword, UserInfoJWT
+from schemas.auth import LoginOut, UserInfo, RefreshTokenInfoOut, TokenIn, ChangePassword, UserInfoJWT, TokensIn, \
+    TokensValidationOut, TokenValidationResult
 from schemas.core import StatusResponse
 from schemas.users import RegisterUserIn, UserFull, LoginUserIn
+from services.blocked_jwt import TokenRevocationInfo
 from services.jwt_generator import JWTGenerator
-from utils.auth import verify_password, get_token_from_headers
-from utils.db import db_session_manager
-from utils.rate_limit import bucket
+from utils.auth import verify_password
+from utils.auth_context import get_auth_context
+from utils.db import db_session_manager, db_read_session_manager
+from utils.rate_limit import limiter
 
 auth = Blueprint(name='auth', import_name=__name__, url_prefix='/v1/auth')
 route_tags = ['Auth']
@@ -50,13 +52,7 @@ def login(json: LoginUserIn):
     Авторизует пользователя для получения JWT токена
     """
     with db_session_manager() as session:
-        query = session.query(User).options(joinedload(User.role).selectinload(Role.permissions)).where(
-            or_(
-                func.lower(User.login) == func.lower(json.login),
-                func.lower(User.email) == func.lower(json.login)
-            )
-        ).order_by(User.deleted_at.desc())
-        user: User = session.scalar(query)
+        user = find_user_by_login(session, json.login)
 
         if (not user) or (not verify_password(json.password, user.password)):
             raise NotAuthorized(ExceptionMessages.incorrect_data())
@@ -87,14 +83,17 @@ def logout(json: TokenIn):
     """
     Блокировка токенов пользователя
     """
-    access_token = get_token_from_headers(request.headers)
+    context = get_auth_context()
 
-    if not JWTGenerator.validate_jwt(access_token):
+    if not context.user:
         raise NotAuthorized(ExceptionMessages.incorrect_token())
 
     try:
-        blocked_jwt_storage.add(json.token)
-        blocked_jwt_storage.add(access_token)
+        refresh_token = JWTGenerator.get_revocation_info(json.token)
+        blocked_jwt_storage.add_many([
+            (refresh_token.token_id, JWTGenerator.get_token_expired_at(json.token), refresh_token.user_id),
+            (context.token_id, context.expired_at, str(context.user_id)),
+        ])
     except ValueError as e:
         raise LogicException(message=str(e))
 
@@ -116,10 +115,15 @@ def generate_access_token(json: TokenIn):
     except jwt.exceptions.InvalidSignatureError:
         raise expired_exception
 
-    if blocked_jwt_storage.have(json.token):
+    revocation_info = TokenRevocationInfo(
+        token_id=info.jti or json.token,
+        user_id=str(info.user_id),
+        issued_at=info.iat
+    )
+    if blocked_jwt_storage.is_revoked(revocation_info):
         raise expired_exception
 
-    with db_session_manager() as session:
+    with db_read_session_manager() as session:
         user = retrieve_object(session.query(User), model=User, id=info.user_id)
         user_model = UserInfo.from_orm(user)
 
@@ -144,12 +148,14 @@ def change_password(json: ChangePassword):
 
         session.flush()
 
+        revoke_user_tokens(session, user)
+
     return StatusResponse().dict()
 
 
 @auth.post('validate-token')
 @api.validate(json=TokenIn, resp=Response(HTTP_200=UserInfoJWT, **responses), tags=route_tags)
-@bucket.rate_limit
+@limiter.rate_limit
 def validate_jwt_token(json: TokenIn):
     """
     Валидация JWT-токена, который прислал сервис (в рамках системы кинотеатра).
@@ -162,9 +168,38 @@ def validate_jwt_token(json: TokenIn):
     Необходимость данный схемы работы обусловлена следующим моментом: сервис, который получает токен, должен
     удостовериться, что этот токен (после того, как пользователь его получил) не был изменен.
     """
-    if blocked_jwt_storage.have(json.token):
-        raise NotAuthorized(ExceptionMessages.expired_token())
-
     user_info = JWTGenerator.validate_jwt(json.token)
 
+    if blocked_jwt_storage.is_revoked(JWTGenerator.get_revocation_info(json.token)):
+        raise NotAuthorized(ExceptionMessages.expired_token())
+
     return user_info.dict()
+
+
+@auth.post('validate-tokens')
+@api.validate(json=TokensIn, resp=Response(HTTP_200=TokensValidationOut, **responses), tags=route_tags)
+@limiter.rate_limit
+def validate_jwt_tokens(json: TokensIn):
+    """
+    Пакетная валидация JWT-токенов (например, для API-шлюза при fan-out запросах).
+
+    Сначала проверяются подписи, после чего токены с верной подписью проверяются на блокировку
+    за один запрос к хранилищу. Результат возвращается для каждого токена в порядке их передачи
+    """
+    validated = JWTGenerator.validate_jwt_many(json.tokens)
+    revocation_infos = [
+        JWTGenerator.get_revocation_info(token)
+        for token, user_info in zip(json.tokens, validated) if not isinstance(user_info, NotAuthorized)
+    ]
+    blocked = iter(blocked_jwt_storage.is_revoked_many(revocation_infos))
+
+    result = []
+    for user_info in validated:
+        if isinstance(user_info, NotAuthorized):
+            result.append(TokenValidationResult(is_valid=False, detail=str(user_info)))
+        elif next(blocked):
+            result.append(TokenValidationResult(is_valid=False, detail=ExceptionMessages.expired_token()))
+        else:
+            result.append(TokenValidationResult(is_valid=True, user=user_info.dict()))
+
+    return TokensValidationOut(data=result).dict()
@@ -0,0 +1,38 @@
+from flask import Blueprint
+from spectree import Response
+
+from core.constants import ROLES
+from core.swagger import api
+from internal.cache import client_cache, redis_breaker, redis_pool, revocation_filter
+from routes.core import responses
+from schemas.metrics import MetricsOut
+from services.jwt_generator import JWTGenerator
+from utils.db import engine, replica_router
+from utils.required import role_required
+
+metrics = Blueprint(name='metrics', import_name=__name__, url_prefix='/v1/metrics')
+route_tags = ['Metrics']
+
+
+@metrics.get('')
+@api.validate(resp=Response(HTTP_200=MetricsOut, **responses), tags=route_tags)
+@role_required([ROLES.administrator.value])
+def get_metrics():
+    """
+    Метрики процесса, обработавшего запрос.
+
+    Позволяют подобрать размеры пулов соединений с БД и Redis под количество воркеров и потоков:
+    рост ``max_wait_ms`` и ошибок (``timeouts``, ``errors``) при исчерпании пула означает нехватку соединений.
+    Срабатывания предохранителя (``redis_breaker.trips``) и рост ``p99_ms`` показывают деградацию Redis
+    """
+    result = MetricsOut(
+        db_pool=engine.pool.stats(),
+        db_replicas=replica_router.stats() if replica_router.replicas else None,
+        redis_pool=redis_pool.stats() if redis_pool is not None else None,
+        redis_breaker=redis_breaker.stats(),
+        token_cache=JWTGenerator.token_cache.stats(),
+        revocation_filter=revocation_filter.stats() if revocation_filter is not None else None,
+        client_cache=client_cache.stats() if client_cache is not None else None
+    )
+
+    return result.dict()
@@ -1,6 +1,6 @@
 import datetime
 
-from flask import Blueprint, redirect, request
+from flask import Blueprint, redirect
 from flask_jwt_extended import jwt_required
 from spectree import Response
 from sqlalchemy.orm import joinedload
@@ -19,7 +19,7 @@ from schemas.oauth import OAuthClientIn, OAuthClientCallbackIn, OAuthUserCreate,
     OAuthAccountCreate
 from schemas.users import RegisterUserIn, UserFull
 from services.jwt_generator import JWTGenerator
-from utils.auth import get_token_from_headers
+from utils.auth_context import get_auth_context
 from utils.db import db_session_manager
 
 oauth = Blueprint(name='oauth', import_name=__name__, url_prefix='/v1/oauth')
@@ -84,8 +84,8 @@ def oauth_deactivate_account(json: RegisterUserIn):
     """
     Деактивация OAuth-аккаунта пользователя в системе авторизации
     """
-    access_token = get_token_from_headers(request.headers)
-    user_info = JWTGenerator.validate_jwt(access_token)
+    context = get_auth_context()
+    user_info = context.user
     json.role_id = ROLES.user.value
 
     with db_session_manager() as session:
@@ -107,7 +107,7 @@ def oauth_deactivate_account(json: RegisterUserIn):
         result = UserFull.from_orm(user)
 
     try:
-        blocked_jwt_storage.add(access_token)
+        blocked_jwt_storage.add(context.token_id, context.expired_at, str(context.user_id))
     except ValueError as e:
         raise LogicException(message=str(e))
 
@@ -13,7 +13,7 @@ from routes.core import responses
 from schemas.core import GetMultiQueryParam
 from schemas.roles import RoleList, RoleBare, RoleFull, RoleCreate, RoleUpdate
 from utils.required import role_required
-from utils.db import db_session_manager
+from utils.db import db_session_manager, db_read_session_manager
 
 roles = Blueprint(name='roles', import_name=__name__, url_prefix='/v1/roles')
 route_tags = ['Roles']
@@ -26,7 +26,7 @@ def get_roles(query: GetMultiQueryParam):
     """
     Получение списка ролей доступных в системе
     """
-    with db_session_manager() as session:
+    with db_read_session_manager() as session:
         roles_result, count = role_crud.get_multi(
             session,
             page=query.page,
@@ -44,7 +44,7 @@ def get_role(role_id: str):
     """
     Получение информации о конкретном роли
     """
-    with db_session_manager() as session:
+    with db_read_session_manager() as session:
         role = role_crud.get(session, role_id)
         return RoleFull.from_orm(role).dict()
 
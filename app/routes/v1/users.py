@@ -7,18 +7,19 @@ from flask import Blueprint, request, send_file
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from spectree import Response
 
+from core.config import envs
 from core.constants import ROLES
 from core.swagger import api
 from internal.cache import redis_cache
 from internal.crud.utils import retrieve_object
 from internal.users import user_crud, check_credentials, get_login_history, connect_two_auth_link, \
-    check_connect_two_auth_link
+    check_connect_two_auth_link, revoke_user_tokens
 from models import User, Role
 from routes.core import responses
 from schemas.core import GetMultiQueryParam, StatusResponse
 from schemas.login_history import UserLoginHistoryList
 from schemas.users import UserBare, UserFull, UserList, UserCreate, UserUpdate, SetUserRole, TwoAuthLinkCodeIn
-from utils.db import db_session_manager
+from utils.db import db_session_manager, db_read_session_manager
 from utils.required import role_required
 
 users = Blueprint(name='users', import_name=__name__, url_prefix='/v1/users')
@@ -32,19 +33,31 @@ def get_users(query: GetMultiQueryParam):
     """
     Получение списка пользователей доступных в системе
     """
-    with db_session_manager() as session:
-        users_result, count = user_crud.get_multi(
-            session,
-            rows_per_page=query.rows_per_page,
-            page=query.page
-        )
+    with db_read_session_manager() as session:
+        if query.cursor is not None:
+            users_result, next_cursor = user_crud.get_multi_by_cursor(
+                session,
+                cursor=query.cursor,
+                rows_per_page=query.rows_per_page
+            )
+            count = None
+        else:
+            users_result, count = user_crud.get_multi(
+                session,
+                rows_per_page=query.rows_per_page,
+                page=query.page,
+                count_strategy=query.count_strategy or envs.pagination.count_strategy
+            )
+            next_cursor = None
         result = [UserBare.from_orm(i) for i in users_result]
 
     return UserList(
         data=result,
-        page=query.page,
+        page=query.page if query.cursor is None else None,
         rows_per_page=query.rows_per_page,
-        rows_number=count
+        rows_number=count.value if count else None,
+        rows_number_strategy=count.strategy if count else None,
+        next_cursor=next_cursor
     ).dict()
 
 
@@ -75,13 +88,14 @@ def get_user_login_histories(user_id: uuid.UUID):
     Получение истории посещений конкретного пользователя
     """
     query_params = GetMultiQueryParam(**request.values)
-    with db_session_manager() as session:
-        history = get_login_history(session, user_id, query_params)
+    with db_read_session_manager() as session:
+        history, next_cursor = get_login_history(session, user_id, query_params)
 
     return UserLoginHistoryList(
         data=history,
-        page=query_params.page,
-        rows_per_page=query_params.rows_per_page
+        page=query_params.page if query_params.cursor is None else None,
+        rows_per_page=query_params.rows_per_page,
+        next_cursor=next_cursor
     ).dict()
 
 
@@ -96,12 +110,13 @@ def get_user_login_history():
     user_id = get_jwt_identity()
 
     with db_session_manager() as session:
-        history = get_login_history(session, user_id, query_params)
+        history, next_cursor = get_login_history(session, user_id, query_params)
 
     return UserLoginHistoryList(
         data=history,
-        page=query_params.page,
-        rows_per_page=query_params.rows_per_page
+        page=query_params.page if query_params.cursor is None else None,
+        rows_per_page=query_params.rows_per_page,
+        next_cursor=next_cursor
     ).dict()
 
 
@@ -232,6 +247,7 @@ def block_user(user_id: uuid.UUID):
         user.deleted_at = datetime.datetime.utcnow()
 
         session.flush()
+        revoke_user_tokens(session, user)
         session.refresh(user)
 
         return UserFull.from_orm(user).dict()
@@ -0,0 +1,27 @@
+from http import HTTPStatus
+
+from flask import Blueprint
+from spectree import Response
+
+from core.swagger import api
+from schemas.auth import JWKSOut
+from services.jwt_generator import JWTGenerator
+
+well_known = Blueprint(name='well_known', import_name=__name__, url_prefix='/.well-known')
+route_tags = ['Well-known']
+
+JWKS_CACHE_SECONDS = 300
+
+
+@well_known.get('/jwks.json')
+@api.validate(resp=Response(HTTP_200=JWKSOut), tags=route_tags)
+def get_jwks():
+    """
+    Публичные ключи для локальной проверки JWT токенов сервисами системы кинотеатра.
+
+    Токены содержат в заголовке ``kid`` - идентификатор ключа из этого набора. При ротации ключей набор
+    содержит все действующие ключи, поэтому сервисам достаточно периодически перечитывать его
+    """
+    result = JWKSOut(**JWTGenerator.key_storage.jwks())
+
+    return result.dict(), HTTPStatus.OK, {'Cache-Control': f'public, max-age={JWKS_CACHE_SECONDS}'}
@@ -7,9 +7,16 @@ from core.swagger import api
 monkey.patch_all()
 
 
+from internal.cache import client_cache, revocation_filter
+from internal.captcha import captcha_service
 from main import app
 
 http_server = WSGIServer(('0.0.0.0', envs.app.port), app)
 
 api.register(app)
+if revocation_filter is not None:
+    revocation_filter.start()
+if client_cache is not None:
+    client_cache.start()
+captcha_service.blocked_cache.start()
 http_server.serve_forever()
@@ -61,7 +61,7 @@ def timestamp_to_unix(value: datetime.datetime | float | int | Any) -> float:
     """
     if type(value) == datetime.datetime:
         value: datetime.datetime
-        return calendar.timegm(value.utctimetuple())
+        return calendar.timegm(value.utctimetuple()) + value.microsecond / 1e6
     elif type(value) == float or type(value) == int:
         return value
     else:
@@ -77,11 +77,17 @@ class RefreshTokenInfoIn(BaseModel):
     user_id: uuid.UUID
     expired_at: float | datetime.datetime = Field(..., alias='exp')
     type: str = Field('refresh', const=True, alias='typ')
+    jti: str = Field(..., description='Идентификатор токена')
+    iat: float | datetime.datetime = Field(..., description='Время выпуска токена')
 
     @validator('expired_at', pre=True)
     def validate_expired_at(cls, value):
         return timestamp_to_unix(value)
 
+    @validator('iat', pre=True)
+    def validate_iat(cls, value):
+        return timestamp_to_unix(value)
+
 
 class RefreshTokenInfoOut(BaseModel):
     """
@@ -92,6 +98,8 @@ class RefreshTokenInfoOut(BaseModel):
     user_id: uuid.UUID
     expired_at: datetime.datetime
     type: str = Field('refresh', const=True, alias='typ')
+    jti: str | None = Field(None, description='Идентификатор токена (отсутствует у токенов старого формата)')
+    iat: float | None = Field(None, description='Время выпуска токена (отсутствует у токенов старого формата)')
 
 
 class TokenInfo(BaseModel):
@@ -102,6 +110,7 @@ class TokenInfo(BaseModel):
     user: 'UserInfoJWT'
     token_expired_at: float | datetime.datetime = Field(..., alias='exp')
     token_created_at: float | datetime.datetime = Field(..., alias='iat')
+    token_id: str | None = Field(None, alias='jti')
 
     @root_validator
     def set_sub(cls, values):
@@ -119,3 +128,21 @@ class TokenInfo(BaseModel):
 
 class TokenIn(Model):
     token: str = Field(..., description='Refresh-токен пользователя')
+
+
+class TokensIn(Model):
+    tokens: list[str] = Field(..., min_items=1, max_items=1000, description='JWT токены для проверки')
+
+
+class TokenValidationResult(Model):
+    is_valid: bool
+    user: UserInfoJWT | None = Field(None, description='Информация о пользователе для валидного токена')
+    detail: str | None = Field(None, description='Причина, по которой токен не прошёл проверку')
+
+
+class TokensValidationOut(Model):
+    data: list[TokenValidationResult] = Field(..., description='Результаты проверки в порядке передачи токенов')
+
+
+class JWKSOut(Model):
+    keys: list[dict] = Field(..., description='Публичные ключи для проверки подписи JWT токенов (RFC 7517)')
@@ -3,6 +3,8 @@ from typing import TypeVar
 
 from pydantic import BaseModel, Field
 
+from core.constants import COUNT_STRATEGY
+
 
 class Model(BaseModel):
     """Промежуточная модель pydantic'а для унифицирования конфигов и удобного администрирования"""
@@ -33,10 +35,15 @@ class ListModel(Model):
     rows_per_page: int | None
     page: int | None
     rows_number: int | None
+    rows_number_strategy: COUNT_STRATEGY | None = Field(
+        None,
+        description='Способ подсчёта rows_number: точно, оценка планировщика БД или точно, но из кэша'
+    )
     show_deleted: bool = False
     data: list[ListElement]
     sort_by: str = 'id'
     descending: bool = False
+    next_cursor: str | None = Field(None, description='Курсор следующей страницы (при пагинации по курсору)')
 
 
 class ErrorSchema(Model):
@@ -59,6 +66,15 @@ class GetMultiQueryParam(BaseModel):
     rows_per_page: int = Field(25, ge=0, le=100)
     page: int = Field(1, ge=1)
     rows_number: int | None
+    count_strategy: COUNT_STRATEGY | None = Field(
+        None,
+        description='Способ подсчёта количества записей (по умолчанию - из настроек сервиса)'
+    )
     show_deleted: bool = False
     sort_by: str = 'id'
-    descending: bool = False
\ No newline at end of file
+    descending: bool = False
+    cursor: str | None = Field(
+        None,
+        description='Пагинация по курсору (от новых записей к старым, без подсчёта общего количества): '
+                    'пустое значение - первая страница, далее - next_cursor из предыдущей выдачи'
+    )
@@ -0,0 +1,35 @@
+from pydantic import Field
+
+from schemas.core import Model
+
+
+class MetricsOut(Model):
+    """
+    Внутренние метрики процесса (воркера) сервиса
+    """
+    db_pool: dict[str, int | float] = Field(..., description='Использование пула соединений с БД')
+    db_replicas: dict[str, int | float | None] | None = Field(
+        None,
+        description='Чтения с реплик БД и их отставание (если реплики настроены)'
+    )
+    redis_pool: dict[str, int | float] | None = Field(
+        None,
+        description='Использование пула соединений с Redis (кроме режима Redis Cluster)'
+    )
+    redis_breaker: dict[str, int | float | str | None] = Field(
+        ...,
+        description='Состояние предохранителя обращений к Redis и длительность обращений'
+    )
+    token_cache: dict[str, int] = Field(..., description='Использование кэша проверенных токенов')
+    revocation_filter: dict[str, int | bool] | None = Field(
+        None,
+        description='Состояние локального фильтра заблокированных токенов (если включен)'
+    )
+    client_cache: dict[str, int | bool] | None = Field(
+        None,
+        description='Использование локального кэша чтений из Redis (если включен)'
+    )
+
+    class Config(Model.Config):
+        # значения метрик разных типов не должны приводиться к первому типу объединения (float -> int)
+        smart_union = True
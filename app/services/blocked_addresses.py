@@ -0,0 +1,127 @@
+import threading
+import time
+
+from services.cache import RedisCache
+from services.pubsub import ChannelListener
+
+
+class BlockedAddressCache:
+    """
+    Локальный (в памяти воркера) кэш проверки блокировки адресов (например, IP адресов, которым нужно решить
+    каптчу).
+
+    Заблокированные адреса хранятся до истечения блокировки, а отсутствие блокировки - ``negative_ttl`` секунд.
+    Блокировки и разблокировки рассылаются всем воркерам через pub/sub, поэтому применяются сразу, а не по
+    истечении ``negative_ttl``. В Redis проверяются только адреса, которых нет в кэше
+    """
+
+    def __init__(
+            self,
+            cache: RedisCache,
+            channel: str = 'captcha:events',
+            negative_ttl: float = 2,
+            max_size: int = 100000,
+    ):
+        """
+        :param cache: хранилище блокировок (ключ - адрес)
+        :param channel: канал pub/sub для рассылки изменений
+        :param negative_ttl: время хранения признака отсутствия блокировки (сек.)
+        :param max_size: количество адресов, после которого из памяти удаляются устаревшие записи
+        """
+        self.cache = cache
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+
+        self._blocked: dict[str, float] = {}
+        self._allowed: dict[str, float] = {}
+        # номера изменений адресов (и всего кэша - при его очистке): результат чтения из Redis
+        # не сохраняется, если во время чтения пришло событие по адресу или кэш был очищен
+        self._generations: dict[str, int] = {}
+        self._cache_generation = 0
+        self._lock = threading.Lock()
+        self._listener = ChannelListener(cache, channel, self._handle_event, on_connect=self.clear)
+
+    def is_blocked(self, key: str) -> bool:
+        now = time.monotonic()
+
+        with self._lock:
+            if self._blocked.get(key, 0) > now:
+                return True
+            if self._allowed.get(key, 0) > now:
+                return False
+            cache_generation, generation = self._cache_generation, self._generations.get(key, 0)
+
+        ttl = self.cache.ttl(key)
+        is_blocked = ttl is not None
+
+        with self._lock:
+            if self._cache_generation != cache_generation:
+                return is_blocked
+            if self._generations.get(key, 0) != generation:
+                # событие, пришедшее во время чтения, новее прочитанного значения
+                return self._blocked.get(key, 0) > now
+
+            self._purge(now)
+            if is_blocked:
+                self._blocked[key] = now + ttl
+            else:
+                self._allowed[key] = now + self.negative_ttl
+
+        return is_blocked
+
+    def block(self, key: str, ttl: int):
+        """
+        Уведомление всех воркеров о блокировке (сама блокировка уже должна быть записана в хранилище)
+        """
+        self._block(key, ttl)
+        self._listener.publish(f'b:{ttl}:{key}')
+
+    def unblock(self, key: str):
+        """
+        Уведомление всех воркеров о снятии блокировки
+        """
+        self._unblock(key)
+        self._listener.publish(f'u:{key}')
+
+    def start(self):
+        """
+        Запуск получения изменений от других воркеров
+        """
+        self._listener.start()
+
+    def clear(self):
+        with self._lock:
+            self._blocked.clear()
+            self._allowed.clear()
+            self._generations.clear()
+            self._cache_generation += 1
+
+    def _block(self, key: str, ttl: float):
+        with self._lock:
+            self._allowed.pop(key, None)
+            self._blocked[key] = time.monotonic() + ttl
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _unblock(self, key: str):
+        with self._lock:
+            self._blocked.pop(key, None)
+            self._allowed.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _handle_event(self, event: str):
+        kind, _, value = event.partition(':')
+
+        if kind == 'b':
+            ttl, _, key = value.partition(':')
+            self._block(key, float(ttl))
+        elif kind == 'u':
+            self._unblock(value)
+
+    def _purge(self, now: float):
+        if len(self._blocked) + len(self._allowed) < self.max_size:
+            return
+
+        self._blocked = {key: expires_at for key, expires_at in self._blocked.items() if expires_at > now}
+        self._allowed = {key: expires_at for key, expires_at in self._allowed.items() if expires_at > now}
+        self._generations = {}
+        self._cache_generation += 1
@@ -1,45 +1,320 @@
 import datetime
+import math
+import time
+from typing import Callable, NamedTuple
 
+from redis.exceptions import RedisError
+
+from core.logger import get_logger
 from services.cache import RedisCache
+from services.revocation_filter import RevocationFilter
+from services.token_cache import VerifiedTokenCache
+
+logger = get_logger(__name__)
+
+# эпоха отзыва пользователя не получена из основного хранилища (БД недоступна)
+EPOCH_UNAVAILABLE = object()
+
+
+class TokenRevocationInfo(NamedTuple):
+    """
+    Данные токена, необходимые для проверки его блокировки
+    """
+    token_id: str
+    user_id: str | None = None
+    issued_at: float | None = None
 
 
 class BlockedJWTStorage:
     """
-    Класс для кэширования заблокированных JWT токенов
+    Класс для кэширования заблокированных JWT токенов.
+
+    Токены хранятся по их идентификатору (``jti``), а не целиком, и ровно столько, сколько токен
+    мог бы быть использован повторно (до истечения его срока действия).
+    При наличии локального фильтра (``RevocationFilter``) в хранилище проверяются только токены,
+    которые фильтр не смог отсеять.
+
+    Помимо отдельных токенов, хранится "эпоха отзыва" пользователя: все токены пользователя, выпущенные
+    раньше неё, считаются заблокированными. Так одной записью отзываются все сессии пользователя.
+
+    Для Redis Cluster ключи токенов и эпохи пользователя снабжаются hash tag ``{user_id}``: все ключи,
+    проверяемые для токена, находятся в одном слоте, и проверка остаётся одним запросом к одному узлу
     """
 
     def __init__(
             self,
             cache: RedisCache,
             ttl: int = 3600 * 12,
+            token_cache: VerifiedTokenCache | None = None,
+            key_prefix: str = 'blocked_jwt:',
+            epoch_key_prefix: str = 'revoked_before:',
+            epoch_loader: Callable[[str], float | None] | None = None,
+            epoch_cache_ttl: int = 600,
+            revocation_filter: RevocationFilter | None = None,
+            fail_open: bool = False,
+            hash_tags: bool = False,
     ):
+        """
+        :param cache: хранилище заблокированных токенов
+        :param ttl: максимальное время хранения заблокированного токена (сек.)
+        :param token_cache: локальный кэш проверенных токенов, из которого удаляются блокируемые токены
+        :param key_prefix: префикс ключей заблокированных токенов в хранилище
+        :param epoch_key_prefix: префикс ключей эпох отзыва токенов пользователей
+        :param epoch_loader: получение эпохи отзыва пользователя из основного хранилища (БД),
+                             если она отсутствует в кэше
+        :param epoch_cache_ttl: время хранения в кэше признака отсутствия эпохи отзыва у пользователя (сек.)
+        :param revocation_filter: локальный фильтр заблокированных токенов, синхронизируемый с хранилищем
+        :param fail_open: при недоступности хранилища (или ``epoch_loader``) считать непроверенные токены
+                          незаблокированными (по умолчанию - заблокированными). Токены, отсеянные локальным
+                          фильтром, проверяются и без хранилища
+        :param hash_tags: размещать ключи токенов пользователя и его эпоху отзыва в одном слоте Redis Cluster
+        """
         self.ttl = ttl
         self.cache = cache
+        self.token_cache = token_cache
+        self.key_prefix = key_prefix
+        self.epoch_key_prefix = epoch_key_prefix
+        self.epoch_loader = epoch_loader
+        self.epoch_cache_ttl = epoch_cache_ttl
+        self.revocation_filter = revocation_filter
+        self.fail_open = fail_open
+        self.hash_tags = hash_tags
+
+    def _key(self, token_id: str, user_id: str | None = None) -> str:
+        if self.hash_tags and user_id is not None:
+            return f'{self.key_prefix}{{{user_id}}}:{token_id}'
+
+        return f'{self.key_prefix}{token_id}'
+
+    def _epoch_key(self, user_id: str) -> str:
+        if self.hash_tags:
+            return f'{self.epoch_key_prefix}{{{user_id}}}'
+
+        return f'{self.epoch_key_prefix}{user_id}'
+
+    def _keys(self, token_id: str, user_id: str | None = None) -> list[str]:
+        """
+        Ключи, под которыми может храниться токен.
+
+        Токены без ``jti`` (идентификатором служит сам токен) до введения префикса хранились без него
+        """
+        if '.' in token_id:
+            return [self._key(token_id, user_id), token_id]
+
+        return [self._key(token_id, user_id)]
 
     def close(self):
         self.cache.close()
 
-    def have(self, token: str) -> bool:
+    def have(self, token_id: str, user_id: str | None = None) -> bool:
         """
         Является ли токен заблокированным.
 
         **Токен обязательно должен быть проверен на валидность, перед использованием**
+
+        :param token_id: идентификатор токена (``JWTGenerator.get_token_id``)
+        :param user_id: идентификатор пользователя токена
         """
-        is_stored = self.cache.have(token)
+        is_stored = any(self.cache.have_many(self._keys(token_id, user_id)))
         return is_stored
 
-    def add(self, token: str):
+    def is_revoked(self, token: TokenRevocationInfo) -> bool:
+        """
+        Является ли токен заблокированным: сам по себе или эпохой отзыва токенов пользователя.
+
+        Обе проверки выполняются за один запрос к хранилищу
+
+        **Токен обязательно должен быть проверен на валидность, перед использованием**
+        """
+        return self.is_revoked_many([token])[0]
+
+    def is_revoked_many(self, tokens: list[TokenRevocationInfo]) -> list[bool]:
+        """
+        Являются ли токены заблокированными (проверка всего набора за один запрос к хранилищу).
+
+        **Токены обязательно должны быть проверены на валидность, перед использованием**
+        """
+        result = [False] * len(tokens)
+
+        checked = list(enumerate(tokens))
+        if self.revocation_filter is not None:
+            checked = [
+                (index, token) for index, token in checked
+                if self.revocation_filter.maybe_revoked(token.token_id, token.user_id)
+            ]
+
+        if not checked:
+            return result
+
+        keys = []
+        for _, token in checked:
+            token_keys = self._keys(token.token_id, token.user_id)
+            if token.user_id is not None:
+                token_keys.append(self._epoch_key(token.user_id))
+            keys.append(token_keys)
+
+        try:
+            values = iter(self.cache.get_many([key for token_keys in keys for key in token_keys]))
+        except RedisError:
+            for index, _ in checked:
+                result[index] = not self.fail_open
+            return result
+
+        loaded_epochs = {}
+        for (index, token), token_keys in zip(checked, keys):
+            token_values = [next(values) for _ in token_keys]
+
+            if token.user_id is None:
+                result[index] = any(value is not None for value in token_values)
+                continue
+
+            *stored, revoked_before = token_values
+            if any(value is not None for value in stored):
+                result[index] = True
+                continue
+
+            if revoked_before is None and self.epoch_loader is not None:
+                if token.user_id not in loaded_epochs:
+                    loaded_epochs[token.user_id] = self._load_epoch(token.user_id)
+                revoked_before = loaded_epochs[token.user_id]
+
+                if revoked_before is EPOCH_UNAVAILABLE:
+                    result[index] = not self.fail_open
+                    continue
+
+            result[index] = self._is_before_epoch(token, revoked_before)
+
+        # эпохи, отсутствовавшие в кэше, сохраняются одним запросом
+        self._cache_epochs({
+            user_id: revoked_before for user_id, revoked_before in loaded_epochs.items()
+            if revoked_before is not EPOCH_UNAVAILABLE
+        })
+
+        return result
+
+    def _load_epoch(self, user_id: str) -> float | None | object:
+        """
+        Получение эпохи отзыва пользователя из основного хранилища
+
+        :return: эпоха отзыва либо ``EPOCH_UNAVAILABLE``, если основное хранилище недоступно
+        """
+        try:
+            return self.epoch_loader(user_id)
+        except Exception as e:
+            logger.warning(f'Failed to load tokens revocation epoch of user {user_id}: {e!r}')
+            return EPOCH_UNAVAILABLE
+
+    def revoke_user(self, user_id: str, revoked_at: float):
+        """
+        Блокирует все токены пользователя, выпущенные до указанного момента
+
+        :param user_id: идентификатор пользователя
+        :param revoked_at: эпоха отзыва (unix timestamp); округляется вверх до секунды, т.к. время выпуска
+                           токенов (``iat``) - целое: токены, выпущенные в ту же секунду до отзыва, блокируются
+                           (как и выпущенные в эту секунду после него). Эпоха должна быть уже сохранена в основном хранилище (транзакция завершена):
+                           иначе параллельная проверка может закэшировать прежнее значение из БД
+        """
+        self.cache.add(self._epoch_key(user_id), str(math.ceil(revoked_at)), self.ttl)
+
+        if self.revocation_filter is not None:
+            self.revocation_filter.publish_epoch(user_id, revoked_at)
+
+    def _cache_epochs(self, epochs: dict[str, float | None]):
+        """
+        Сохранение в кэш эпох отзыва, полученных из основного хранилища (в том числе их отсутствия).
+
+        Значения из БД могут устареть к моменту записи (``revoke_user`` мог успеть сохранить новую эпоху),
+        поэтому существующие ключи не перезаписываются
+        """
+        items = []
+        for user_id, revoked_before in epochs.items():
+            if revoked_before is None:
+                items.append((self._epoch_key(user_id), '0', self.epoch_cache_ttl))
+            else:
+                items.append((self._epoch_key(user_id), str(math.ceil(revoked_before)), self.ttl))
+
+        self.cache.add_many(items, only_new=True)
+
+        if self.revocation_filter is not None:
+            for user_id, revoked_before in epochs.items():
+                if revoked_before is not None:
+                    self.revocation_filter.publish_epoch(user_id, revoked_before)
+
+    @staticmethod
+    def _is_before_epoch(token: TokenRevocationInfo, revoked_before: bytes | str | float | None) -> bool:
+        revoked_before = math.ceil(float(revoked_before or 0))
+        if not revoked_before:
+            return False
+
+        return token.issued_at is None or token.issued_at < revoked_before
+
+    def add(self, token_id: str, expired_at: float | None = None, user_id: str | None = None):
         """
         Добавляет токен в заблокированные.
 
         Блокируется как основной jwt токен, так и refresh токен
+
+        :param token_id: идентификатор токена (``JWTGenerator.get_token_id``)
+        :param expired_at: время истечения токена (unix timestamp); запись хранится до этого момента,
+                           но не дольше ``ttl``. Уже истёкшие токены не сохраняются
+        :param user_id: идентификатор пользователя токена (``TokenRevocationInfo.user_id``)
+        """
+        self.add_many([(token_id, expired_at, user_id)])
+
+    def add_many(self, tokens: list[tuple[str, float | None, str | None]]):
+        """
+        Добавляет набор токенов в заблокированные за один запрос к хранилищу
+
+        :param tokens: идентификатор, время истечения и идентификатор пользователя (см. ``add``) каждого токена
         """
+        now = time.time()
         value = datetime.datetime.utcnow().isoformat()
-        self.cache.add(token, value, self.ttl)
 
-    def clear(self):
+        items = []
+        token_ids = []
+        for token_id, expired_at, user_id in tokens:
+            ttl = self.ttl
+            if expired_at is not None:
+                ttl = min(ttl, math.ceil(expired_at - now))
+
+            if ttl > 0:
+                items.append((self._key(token_id, user_id), value, ttl))
+                token_ids.append(token_id)
+
+        self.cache.add_many(items)
+
+        if self.revocation_filter is not None and token_ids:
+            self.revocation_filter.publish_tokens(token_ids)
+
+        if self.token_cache is not None:
+            for token_id, _, _ in tokens:
+                self.token_cache.discard(token_id)
+
+    def stats(self, batch_size: int = 1000) -> dict[str, int]:
+        """
+        Количество заблокированных токенов и занимаемая ими память в хранилище
+
+        :param batch_size: количество ключей, обрабатываемых за один запрос к хранилищу
         """
-        Очищает хранилище токенов
+        keys_count = 0
+        memory = 0
+        for keys in self.cache.scan(f'{self.key_prefix}*', batch_size):
+            keys_count += len(keys)
+            memory += sum(self.cache.memory_usage(keys))
+
+        return {
+            'keys': keys_count,
+            'memory_bytes': memory,
+            'avg_key_bytes': memory // keys_count if keys_count else 0,
+        }
+
+    def clear(self, batch_size: int = 1000) -> int:
+        """
+        Очищает хранилище токенов: заблокированные токены и эпохи отзыва (прочие данные в Redis не затрагиваются).
+
+        Токены старого формата, хранящиеся без префикса, не удаляются - они истекут сами
 
+        :param batch_size: количество ключей, удаляемых за один запрос к хранилищу
+        :return: количество удалённых ключей
         """
-        self.cache.clear()
+        return self.cache.clear(self.key_prefix, batch_size) + self.cache.clear(self.epoch_key_prefix, batch_size)
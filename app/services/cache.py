@@ -1,11 +1,35 @@
-from typing import Any
+import itertools
+import math
+import re
+from typing import Any, Callable, Iterator, TypeVar
 
-from redis.client import Redis
+from redis.client import PubSub, Redis
+from redis.cluster import RedisCluster
+
+from services.circuit_breaker import CircuitBreaker
+from services.client_cache import ClientSideCache
+
+T = TypeVar('T')
 
 
 class RedisCache:
-    def __init__(self, client: Redis):
+    def __init__(
+            self,
+            client: Redis | RedisCluster,
+            local_cache: ClientSideCache | None = None,
+            breaker: CircuitBreaker | None = None,
+    ):
+        """
+        :param client: клиент Redis (в том числе Redis Cluster)
+        :param local_cache: локальный кэш чтений (``get``, ``have`` и их пакетные версии) с инвалидацией
+                            через ``CLIENT TRACKING``
+        :param breaker: предохранитель, через который выполняются все обращения к Redis (кроме подписок)
+        """
         self.client = client
+        self.local_cache = local_cache
+        self.breaker = breaker
+        # в кластере ключи одного запроса могут находиться в разных слотах: MGET выполняется по слотам
+        self._mget = getattr(client, 'mget_nonatomic', client.mget)
 
     def add(self, key: str, value: str, ttl: int | None = None):
         """
@@ -14,17 +38,37 @@ class RedisCache:
         Блокируется как основной jwt токен, так и refresh токен
         """
         if ttl:
-            self.client.setex(name=key, value=value, time=ttl)
+            self._call(self.client.setex, name=key, value=value, time=ttl)
         else:
-            self.client.set(name=key, value=value)
+            self._call(self.client.set, name=key, value=value)
 
-    def pop(self, key: str) -> Any:
+        self._invalidate([key])
+
+    def add_many(self, items: list[tuple[str, str, int | None]], only_new: bool = False):
         """
-        Удаление элемента из хранилища
+        Добавление набора ключей за один запрос к хранилищу
+
+        :param items: ключ, значение и время жизни (сек., ``None`` - бессрочно) для каждого ключа
+        :param only_new: не перезаписывать уже существующие ключи (``SET NX``)
         """
-        value = self.get(key)
+        if not items:
+            return
+
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value, ttl in items:
+            pipeline.set(name=key, value=value, ex=ttl or None, nx=only_new)
 
-        self.client.delete(key)
+        self._call(pipeline.execute)
+        self._invalidate([key for key, _, _ in items])
+
+    def pop(self, key: str) -> Any:
+        """
+        Удаление элемента из хранилища (атомарно, за один запрос)
+
+        :return: значение удалённого элемента
+        """
+        value = self._call(self.client.getdel, key)
+        self._invalidate([key])
 
         return value
 
@@ -32,7 +76,22 @@ class RedisCache:
         """
         Получение данных по ключу
         """
-        return self.client.get(key)
+        if self.local_cache is not None:
+            return self._call(self.local_cache.get_many, [key], self._mget)[0]
+
+        return self._call(self.client.get, key)
+
+    def get_many(self, keys: list[str]) -> list[Any | None]:
+        """
+        Получение данных по набору ключей за один запрос к хранилищу
+        """
+        if not keys:
+            return []
+
+        if self.local_cache is not None:
+            return self._call(self.local_cache.get_many, keys, self._mget)
+
+        return self._call(self._mget, keys)
 
     def close(self) -> None:
         """
@@ -43,9 +102,109 @@ class RedisCache:
     def have(self, value: str) -> bool:
         """
         """
-        is_stored = self.client.exists(value)
+        if self.local_cache is not None:
+            return self.get(value) is not None
+
+        is_stored = self._call(self.client.exists, value)
 
         return bool(is_stored)
 
-    def clear(self):
-        self.client.flushall()
+    def ttl(self, key: str) -> float | None:
+        """
+        Оставшееся время жизни ключа (сек.): ``None`` - ключ отсутствует, ``inf`` - ключ бессрочный
+        """
+        ttl = self._call(self.client.pttl, key)
+
+        if ttl == -2:
+            return None
+        if ttl == -1:
+            return math.inf
+
+        return ttl / 1000
+
+    def have_many(self, keys: list[str]) -> list[bool]:
+        """
+        Проверка наличия набора ключей за один запрос к хранилищу
+        """
+        if self.local_cache is not None:
+            return [value is not None for value in self.get_many(keys)]
+
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.exists(key)
+
+        return [bool(i) for i in self._call(pipeline.execute)]
+
+    def scan(self, match: str, batch_size: int = 1000) -> Iterator[list[str]]:
+        """
+        Инкрементальный обход ключей по шаблону (без блокировки хранилища)
+
+        :return: итератор по пачкам ключей (в кластере - по всем узлам)
+        """
+        keys_iterator = self.client.scan_iter(match=match, count=batch_size)
+        while keys := self._call(lambda: list(itertools.islice(keys_iterator, batch_size))):
+            yield keys
+
+    def memory_usage(self, keys: list[str]) -> list[int]:
+        """
+        Объём памяти, занимаемый ключами в хранилище (в байтах)
+        """
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.memory_usage(key)
+
+        return [i or 0 for i in self._call(pipeline.execute)]
+
+    def publish(self, channel: str, message: str):
+        """
+        Отправка сообщения всем подписчикам канала
+        """
+        self._call(self.client.publish, channel, message)
+
+    def pubsub(self) -> PubSub:
+        """
+        Отдельное соединение для подписки на каналы (служебные сообщения о подписке пропускаются)
+        """
+        return self.client.pubsub(ignore_subscribe_messages=True)
+
+    def delete(self, keys: list[str]) -> int:
+        """
+        Удаление набора ключей за один запрос к хранилищу (память освобождается Redis в фоне)
+
+        :return: количество удалённых ключей
+        """
+        if not keys:
+            return 0
+
+        deleted = self._call(self.client.unlink, *keys)
+        self._invalidate(keys)
+
+        return deleted
+
+    def clear(self, prefix: str, batch_size: int = 1000) -> int:
+        """
+        Удаление всех ключей с префиксом (пространства ключей одной подсистемы).
+
+        Ключи удаляются пачками по мере инкрементального обхода, поэтому хранилище не блокируется даже
+        при миллионах ключей, а ключи других подсистем не затрагиваются
+
+        :param prefix: префикс ключей подсистемы
+        :param batch_size: количество ключей, обрабатываемых за один запрос к хранилищу
+        :return: количество удалённых ключей
+        """
+        if not prefix:
+            raise ValueError('Key prefix is required')
+
+        match = re.sub(r'([*?\[\]\\])', r'\\\1', prefix) + '*'
+
+        return sum(self.delete(keys) for keys in self.scan(match, batch_size))
+
+    def _call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self.breaker is None:
+            return func(*args, **kwargs)
+
+        return self.breaker.call(func, *args, **kwargs)
+
+    def _invalidate(self, keys: list[str]):
+        if self.local_cache is not None:
+            self.local_cache.invalidate(keys)
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import deque
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any, Callable, TypeVar
+
+import gevent
+from gevent import monkey
+from redis.exceptions import ConnectionError, TimeoutError
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar('T')
+
+
+class CircuitOpenError(ConnectionError):
+    """
+    Обращение к Redis отклонено без попытки выполнения: предохранитель разомкнут
+    """
+
+
+class CircuitBreaker:
+    """
+    Предохранитель обращений к Redis.
+
+    Каждое обращение ограничено сроком ``deadline``: под gevent (``run.py``) обращение прерывается по его
+    истечении, иначе длительность ограничивается таймаутом сокета, а обращение дольше срока считается
+    неудачным. После ``failure_threshold`` неудачных обращений подряд предохранитель размыкается, и в течение
+    ``recovery_time`` обращения сразу завершаются ``CircuitOpenError``. Затем выполняется одно пробное
+    обращение: при успехе предохранитель замыкается, при ошибке - снова размыкается.
+
+    Как поступить при ошибке (пропустить запрос или отказать), решает каждая подсистема
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+            self,
+            deadline: float = 0.25,
+            failure_threshold: int = 5,
+            recovery_time: float = 5,
+            latency_window: int = 1000,
+    ):
+        """
+        :param deadline: максимальная длительность одного обращения (сек.)
+        :param failure_threshold: количество неудачных обращений подряд, после которого предохранитель размыкается
+        :param recovery_time: время до пробного обращения после размыкания (сек.)
+        :param latency_window: количество последних обращений, по которым считаются перцентили длительности
+        """
+        self.deadline = deadline
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+
+        self.state = self.CLOSED
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.trips = 0
+        self.last_trip_at: float | None = None
+
+        self._failures = 0
+        self._opened_at = 0.0
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Выполнение обращения к Redis через предохранитель
+
+        :raises CircuitOpenError: если предохранитель разомкнут
+        :raises redis.exceptions.TimeoutError: если обращение прервано по истечении срока
+        """
+        self._acquire()
+
+        started_at = time.perf_counter()
+        try:
+            with self._deadline():
+                result = func(*args, **kwargs)
+        except (ConnectionError, TimeoutError, OSError) as e:
+            self._release(time.perf_counter() - started_at, failed=True, timed_out=isinstance(e, TimeoutError))
+            raise
+        except BaseException:
+            # ответ от Redis получен (например, ошибка команды) - Redis доступен
+            self._release(time.perf_counter() - started_at, failed=False)
+            raise
+
+        elapsed = time.perf_counter() - started_at
+        is_slow = elapsed > self.deadline
+        self._release(elapsed, failed=is_slow, timed_out=is_slow)
+
+        return result
+
+    def stats(self) -> dict[str, int | float | str | None]:
+        """
+        Состояние предохранителя и длительность последних обращений
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'state': self.state,
+                'trips': self.trips,
+                'last_trip_at': self.last_trip_at,
+                'calls': self.calls,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+                'rejected': self.rejected,
+            }
+
+        stats['avg_ms'] = round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0
+        stats['p99_ms'] = round(latencies[int(len(latencies) * 0.99)] * 1000, 3) if latencies else 0
+        stats['max_ms'] = round(latencies[-1] * 1000, 3) if latencies else 0
+
+        return stats
+
+    def _acquire(self):
+        with self._lock:
+            self.calls += 1
+
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_time:
+                # пробное обращение; остальные обращения отклоняются до его завершения
+                self.state = self.HALF_OPEN
+                return
+
+            if self.state != self.CLOSED:
+                self.rejected += 1
+                raise CircuitOpenError(f'Redis circuit breaker is {self.state}')
+
+    def _release(self, elapsed: float, failed: bool, timed_out: bool = False):
+        with self._lock:
+            self._latencies.append(elapsed)
+
+            if not failed:
+                self._failures = 0
+                if self.state == self.HALF_OPEN:
+                    self.state = self.CLOSED
+                    logger.info('Redis circuit breaker closed')
+                return
+
+            self.errors += 1
+            self.timeouts += timed_out
+            self._failures += 1
+
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self._failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.trips += 1
+                self.last_trip_at = time.time()
+                logger.warning(
+                    f'Redis circuit breaker opened after {self._failures} failed calls '
+                    f'(last call took {elapsed * 1000:.1f} ms)'
+                )
+
+    def _deadline(self) -> AbstractContextManager:
+        if self.deadline and monkey.is_module_patched('socket'):
+            return gevent.Timeout(self.deadline, TimeoutError(f'Redis call exceeded {self.deadline} s deadline'))
+
+        return nullcontext()
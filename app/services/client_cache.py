@@ -0,0 +1,233 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from redis.client import Redis
+from redis.connection import BlockingConnectionPool, Connection, ConnectionPool
+from redis.exceptions import ConnectionError, RedisError
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ClientSideCache:
+    """
+    Локальный (в памяти воркера) кэш значений ключей Redis с инвалидацией на стороне сервера
+    (server-assisted client-side caching, ``CLIENT TRACKING``).
+
+    Значения читаются через отдельный небольшой пул соединений с включённым отслеживанием: Redis запоминает
+    прочитанные через них ключи и при изменении, удалении или истечении ключа присылает их имена в канал
+    ``__redis__:invalidate`` служебного соединения воркера (режим ``REDIRECT``, т.к. клиент работает
+    по протоколу RESP2). Пока служебное соединение не подключено, чтение идёт напрямую в Redis
+    """
+    INVALIDATION_CHANNEL = '__redis__:invalidate'
+
+    def __init__(
+            self,
+            pool: ConnectionPool,
+            max_size: int = 10000,
+            ttl: float = 60,
+            pool_size: int = 4,
+            pool_timeout: float = 1,
+            poll_timeout: float = 1.0,
+            ping_interval: float = 10.0,
+            retry_delay: float = 1.0,
+    ):
+        """
+        :param pool: основной пул соединений (параметры подключения к Redis)
+        :param max_size: максимальное количество ключей в кэше (давно не читавшиеся ключи вытесняются)
+        :param ttl: максимальное время хранения значения (сек.), страховка на случай задержки инвалидации
+        :param pool_size: количество соединений с отслеживанием ключей
+        :param pool_timeout: максимальное время ожидания свободного соединения с отслеживанием (сек.)
+        :param poll_timeout: время ожидания сообщения служебным соединением за одну итерацию (сек.)
+        :param ping_interval: период проверки служебного соединения при отсутствии сообщений (сек.)
+        :param retry_delay: пауза перед переподключением служебного соединения (сек.)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.poll_timeout = poll_timeout
+        self.ping_interval = ping_interval
+        self.retry_delay = retry_delay
+
+        self.redirect_id: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._connection_class: type[Connection] = pool.connection_class
+        self._connection_kwargs = dict(pool.connection_kwargs)
+        self._pool = BlockingConnectionPool(
+            max_connections=pool_size,
+            timeout=pool_timeout,
+            connection_class=self._connection_class,
+            redis_connect_func=self._enable_tracking,
+            **self._connection_kwargs
+        )
+        self._client = Redis(connection_pool=self._pool)
+        self._values: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        # меняется при каждой инвалидации: значение, прочитанное до неё, в кэш не попадает
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._started = False
+
+    @property
+    def is_ready(self) -> bool:
+        return self.redirect_id is not None
+
+    def get_many(self, keys: list[str], fallback: Callable[[list[str]], list[Any | None]]) -> list[Any | None]:
+        """
+        Получение значений ключей (в том числе отсутствующих в Redis) из кэша, недостающих - из Redis
+
+        :param keys: ключи
+        :param fallback: чтение ключей без кэширования, если отслеживание ключей недоступно
+        """
+        if not self.is_ready:
+            return fallback(keys)
+
+        now = time.monotonic()
+        result: list[Any | None] = [None] * len(keys)
+        missing: list[int] = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._values.get(key)
+                if entry is not None and entry[1] > now:
+                    self._values.move_to_end(key)
+                    result[i] = entry[0]
+                else:
+                    missing.append(i)
+
+            generation = self._generation
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if not missing:
+            return result
+
+        missing_keys = [keys[i] for i in missing]
+        try:
+            values = self._client.mget(missing_keys)
+        except ConnectionError:
+            values = fallback(missing_keys)
+            generation = None
+
+        with self._lock:
+            if generation == self._generation and self.is_ready:
+                expires_at = now + self.ttl
+                for key, value in zip(missing_keys, values):
+                    self._values[key] = (value, expires_at)
+                    self._values.move_to_end(key)
+
+                while len(self._values) > self.max_size:
+                    self._values.popitem(last=False)
+
+        for i, value in zip(missing, values):
+            result[i] = value
+
+        return result
+
+    def invalidate(self, keys: list[str]):
+        """
+        Удаление ключей из кэша (при записи через этот же воркер, не дожидаясь сообщения от Redis)
+        """
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._values.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._values.clear()
+
+    def start(self):
+        """
+        Запуск служебного соединения, получающего инвалидации (повторный вызов ничего не делает)
+        """
+        if self._started:
+            return
+
+        self._started = True
+        threading.Thread(target=self._listen, name='client-cache-invalidation', daemon=True).start()
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            'is_ready': self.is_ready,
+            'size': len(self._values),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
+
+    def _enable_tracking(self, connection: Connection):
+        connection.on_connect()
+
+        redirect_id = self.redirect_id
+        if redirect_id is None:
+            raise ConnectionError('Client side cache invalidation connection is not established')
+
+        connection.send_command('CLIENT', 'TRACKING', 'ON', 'REDIRECT', redirect_id)
+        connection.read_response()
+
+    def _listen(self):
+        while True:
+            connection = self._connection_class(**self._connection_kwargs)
+            try:
+                connection.connect()
+                connection.send_command('CLIENT', 'ID')
+                client_id = int(connection.read_response())
+                connection.send_command('SUBSCRIBE', self.INVALIDATION_CHANNEL)
+                connection.read_response()
+                self._on_connect(client_id)
+
+                last_read_at = time.monotonic()
+                is_ping_sent = False
+                while True:
+                    if connection.can_read(timeout=self.poll_timeout):
+                        self._handle_message(connection.read_response())
+                        last_read_at = time.monotonic()
+                        is_ping_sent = False
+                    elif time.monotonic() - last_read_at >= self.ping_interval:
+                        if is_ping_sent:
+                            raise ConnectionError('No reply to PING')
+
+                        connection.send_command('PING')
+                        last_read_at = time.monotonic()
+                        is_ping_sent = True
+            except (RedisError, OSError, ValueError) as e:
+                logger.warning(f'Lost client side cache invalidation connection: {e}')
+            finally:
+                self._on_disconnect()
+                connection.disconnect()
+
+            time.sleep(self.retry_delay)
+
+    def _on_connect(self, client_id: int):
+        with self._lock:
+            self._generation += 1
+            self._values.clear()
+            self.redirect_id = client_id
+
+        # соединения с отслеживанием переподключаются с новым адресом для инвалидаций
+        self._pool.disconnect()
+
+    def _on_disconnect(self):
+        with self._lock:
+            self._generation += 1
+            self._values.clear()
+            self.redirect_id = None
+
+    def _handle_message(self, response: Any):
+        if not isinstance(response, list) or len(response) < 3 or response[0] != b'message':
+            return
+
+        keys = response[2]
+        self.invalidations += 1
+        # пустое сообщение - сброс всех ключей (FLUSHALL или переполнение таблицы отслеживания на сервере)
+        if keys is None:
+            self.clear()
+        else:
+            self.invalidate([key.decode() if isinstance(key, bytes) else key for key in keys])
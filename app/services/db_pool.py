@@ -0,0 +1,66 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    Пул соединений с БД со статистикой использования.
+
+    Время получения соединения учитывается вместе с ожиданием свободного соединения, установкой нового
+    и проверкой соединения (``pool_pre_ping``). При пересоздании пула (``Engine.dispose``) статистика
+    начинается заново
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._stats_lock = threading.Lock()
+        self.max_in_use = 0
+        self.max_overflow_in_use = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def connect(self):
+        started_at = time.perf_counter()
+
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+
+        wait_time = time.perf_counter() - started_at
+
+        with self._stats_lock:
+            self.max_in_use = max(self.max_in_use, self.checkedout())
+            self.max_overflow_in_use = max(self.max_overflow_in_use, self.overflow())
+            self.acquired += 1
+            self.wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+        return connection
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Статистика использования пула
+        """
+        with self._stats_lock:
+            return {
+                'pool_size': self.size(),
+                'max_overflow': self._max_overflow,
+                'in_use': self.checkedout(),
+                'idle': self.checkedin(),
+                'overflow': max(0, self.overflow()),
+                'max_in_use': self.max_in_use,
+                'max_overflow_in_use': self.max_overflow_in_use,
+                'acquired': self.acquired,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.wait_time / self.acquired * 1000, 3) if self.acquired else 0,
+                'max_wait_ms': round(self.max_wait_time * 1000, 3),
+            }
@@ -0,0 +1,114 @@
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# отставание реплики (сек.); реплика, воспроизведшая весь полученный WAL, не отстаёт,
+# даже если на основном сервере давно не было записей
+REPLICATION_LAG_QUERY = text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+)
+
+
+class ReplicaRouter:
+    """
+    Выбор сервера БД для чтения: реплики по очереди, основной сервер - если реплик нет
+    или все они недоступны либо отстают больше допустимого.
+
+    Доступность и отставание каждой реплики проверяются не чаще раза в ``lag_check_interval`` в потоке запроса,
+    которому эта реплика досталась; до следующей проверки используется последний результат. Без ``max_lag``
+    отставание не ограничивается, но недоступная реплика всё равно исключается до следующей проверки
+    """
+
+    def __init__(
+            self,
+            primary: Engine,
+            replicas: list[Engine],
+            max_lag: float | None = None,
+            lag_check_interval: float = 5,
+    ):
+        """
+        :param primary: подключение к основному серверу
+        :param replicas: подключения к репликам
+        :param max_lag: максимальное допустимое отставание реплики (сек.), без ограничения - None
+        :param lag_check_interval: период проверки доступности и отставания реплики (сек.)
+        """
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+
+        self.reads = 0
+        self.fallbacks = 0
+
+        self._lags: dict[Engine, float | None] = {replica: None for replica in replicas}
+        self._checked_at: dict[Engine, float] = {replica: float('-inf') for replica in replicas}
+        self._lock = threading.Lock()
+
+    def get_engine(self) -> Engine:
+        """
+        Подключение для очередного чтения
+        """
+        with self._lock:
+            # очередная реплика, затем (если она недоступна) остальные по порядку
+            offset = self.reads % len(self.replicas) if self.replicas else 0
+            candidates = self.replicas[offset:] + self.replicas[:offset]
+            self.reads += 1
+
+        for replica in candidates:
+            if self._is_available(replica):
+                return replica
+
+        if self.replicas:
+            with self._lock:
+                self.fallbacks += 1
+
+        return self.primary
+
+    def stats(self) -> dict[str, int | float | None]:
+        """
+        Количество чтений, переключений на основной сервер и отставание реплик
+        """
+        with self._lock:
+            lags = [lag for lag in self._lags.values() if lag is not None]
+            return {
+                'replicas': len(self.replicas),
+                'available': sum(self._is_lag_acceptable(lag) for lag in self._lags.values()),
+                'reads': self.reads,
+                'fallbacks': self.fallbacks,
+                'max_lag_s': round(max(lags), 3) if lags else None,
+            }
+
+    def _is_available(self, replica: Engine) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            is_expired = now - self._checked_at[replica] >= self.lag_check_interval
+            if is_expired:
+                # проверку выполняет один поток, остальные до её завершения используют прошлый результат
+                self._checked_at[replica] = now
+            lag = self._lags[replica]
+
+        if is_expired:
+            lag = self._check_lag(replica)
+            with self._lock:
+                self._lags[replica] = lag
+
+        return self._is_lag_acceptable(lag)
+
+    def _is_lag_acceptable(self, lag: float | None) -> bool:
+        return lag is not None and (self.max_lag is None or lag <= self.max_lag)
+
+    def _check_lag(self, replica: Engine) -> float | None:
+        try:
+            with replica.connect() as connection:
+                return float(connection.scalar(REPLICATION_LAG_QUERY) or 0)
+        except SQLAlchemyError as e:
+            logger.warning(f'Failed to check replication lag of {replica.url.host}: {e}')
+            return None
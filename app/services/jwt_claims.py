@@ -0,0 +1,177 @@
+import uuid
+from typing import Any
+
+from schemas.auth import RefreshTokenInfoIn, TokenInfo, UserInfoJWT
+
+
+class UserClaims:
+    """
+    Данные пользователя, хранящиеся в JWT токене (аналог ``UserInfoJWT`` без валидации pydantic)
+    """
+    __slots__ = ('id', 'role_id', 'role_name')
+
+    def __init__(self, id: uuid.UUID, role_id: uuid.UUID, role_name: str | None):
+        self.id = id
+        self.role_id = role_id
+        self.role_name = role_name
+
+    def dict(self) -> dict[str, Any]:
+        return {'id': self.id, 'role_id': self.role_id, 'role_name': self.role_name}
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, UserClaims):
+            return NotImplemented
+
+        return self.id == other.id and self.role_id == other.role_id and self.role_name == other.role_name
+
+    def __repr__(self) -> str:
+        return f'UserClaims(id={self.id!r}, role_id={self.role_id!r}, role_name={self.role_name!r})'
+
+
+class AccessTokenClaims:
+    """
+    Данные, хранящиеся в JWT access токене (аналог ``TokenInfo`` без валидации pydantic)
+    """
+    __slots__ = ('sub', 'user', 'token_expired_at', 'token_created_at', 'token_id')
+
+    def __init__(
+            self,
+            user: UserClaims,
+            token_expired_at: float,
+            token_created_at: float,
+            token_id: str | None = None,
+    ):
+        self.sub = user.id
+        self.user = user
+        self.token_expired_at = token_expired_at
+        self.token_created_at = token_created_at
+        self.token_id = token_id
+
+    def dict(self, by_alias: bool = False) -> dict[str, Any]:
+        if by_alias:
+            return {
+                'sub': self.sub,
+                'user': self.user.dict(),
+                'exp': self.token_expired_at,
+                'iat': self.token_created_at,
+                'jti': self.token_id,
+            }
+
+        return {
+            'sub': self.sub,
+            'user': self.user.dict(),
+            'token_expired_at': self.token_expired_at,
+            'token_created_at': self.token_created_at,
+            'token_id': self.token_id,
+        }
+
+
+class ClaimsCodec:
+    """
+    Преобразование данных токенов между словарями (payload JWT) и объектами.
+
+    По умолчанию данные проверяются вручную, без создания pydantic моделей (горячий путь выпуска и проверки
+    токенов). В строгом режиме кодирование и декодирование выполняются через pydantic схемы
+    (``TokenInfo``, ``RefreshTokenInfoIn``), что удобно для отладки формата токенов
+    """
+
+    def __init__(self, strict: bool = False):
+        """
+        :param strict: проверять данные токенов pydantic схемами
+        """
+        self.strict = strict
+
+    def encode_access(
+            self,
+            user: Any,
+            expired_at: float,
+            issued_at: float,
+            token_id: str,
+    ) -> dict[str, Any]:
+        """
+        Данные для access токена
+
+        :param user: данные пользователя (объект с полями ``id``, ``role_id``, ``role_name``)
+        :param expired_at: время истечения токена (unix timestamp)
+        :param issued_at: время выпуска токена (unix timestamp)
+        :param token_id: идентификатор токена
+        """
+        if self.strict:
+            user = UserInfoJWT(id=user.id, role_id=user.role_id, role_name=user.role_name)
+            return TokenInfo(user=user, exp=expired_at, iat=issued_at, jti=token_id).dict(by_alias=True)
+
+        user_id = str(user.id)
+
+        return {
+            'sub': user_id,
+            'user': {'id': user_id, 'role_id': str(user.role_id), 'role_name': user.role_name},
+            'exp': expired_at,
+            'iat': issued_at,
+            'jti': token_id,
+        }
+
+    def encode_refresh(self, user_id: uuid.UUID, expired_at: float, issued_at: float, token_id: str) -> dict[str, Any]:
+        """
+        Данные для refresh токена
+
+        :param user_id: идентификатор пользователя
+        :param expired_at: время истечения токена (unix timestamp)
+        :param issued_at: время выпуска токена (unix timestamp)
+        :param token_id: идентификатор токена
+        """
+        if self.strict:
+            return RefreshTokenInfoIn(user_id=user_id, exp=expired_at, iat=issued_at, jti=token_id).dict()
+
+        return {
+            'user_id': str(user_id),
+            'expired_at': expired_at,
+            'type': 'refresh',
+            'jti': token_id,
+            'iat': issued_at,
+        }
+
+    def decode_access(self, claims: dict[str, Any]) -> AccessTokenClaims:
+        """
+        Получение данных из access токена
+
+        :raises ValueError: если данные не соответствуют формату access токена
+        """
+        try:
+            if self.strict:
+                return self._decode_access_strict(claims)
+
+            user = claims['user']
+            role_name = user.get('role_name')
+            token_id = claims.get('jti')
+            user_claims = UserClaims(
+                id=self._uuid(user['id']),
+                role_id=self._uuid(user['role_id']),
+                role_name=role_name if role_name is None else str(role_name)
+            )
+
+            return AccessTokenClaims(
+                user=user_claims,
+                token_expired_at=self._timestamp(claims['exp']),
+                token_created_at=self._timestamp(claims['iat']),
+                token_id=token_id if token_id is None else str(token_id)
+            )
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f'Incorrect access token claims: {e!r}')
+
+    @staticmethod
+    def _decode_access_strict(claims: dict[str, Any]) -> AccessTokenClaims:
+        token_info = TokenInfo(**claims)
+        user = UserClaims(token_info.user.id, token_info.user.role_id, token_info.user.role_name)
+
+        return AccessTokenClaims(user, token_info.token_expired_at, token_info.token_created_at, token_info.token_id)
+
+    @staticmethod
+    def _uuid(value: Any) -> uuid.UUID:
+        return value if isinstance(value, uuid.UUID) else uuid.UUID(value)
+
+    @staticmethod
+    def _timestamp(value: Any) -> float:
+        if type(value) not in (int, float):
+            raise ValueError('Only timestamps allowed')
+
+        return value
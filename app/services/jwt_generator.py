@@ -1,14 +1,19 @@
 import datetime
 import logging
+import secrets
+import time
 
 import jwt
-from pydantic import ValidationError
 
 from core.config import envs
 from core.exceptions.default_messages import ExceptionMessages
 from core.exceptions.exceptions import NotAuthorized
 from core.logger import get_logger
-from schemas.auth import UserInfo, Token, RefreshTokenInfoIn, TokenInfo, UserInfoJWT
+from schemas.auth import UserInfo, Token
+from services.blocked_jwt import TokenRevocationInfo
+from services.jwt_claims import AccessTokenClaims, ClaimsCodec, UserClaims
+from services.jwt_keys import JWTKeyStorage
+from services.token_cache import VerifiedTokenCache
 from utils.trace import trace_request
 
 logger = get_logger(__name__)
@@ -18,8 +23,17 @@ class JWTGenerator:
     """
     Синглтон для работы с jwt
     """
-    JWT_SECRET = envs.token.secret
-    DEFAULT_ALGORITHM = 'HS256'
+    key_storage = JWTKeyStorage(
+        algorithm=envs.token.algorithm,
+        secret=envs.token.secret,
+        keys_dir=envs.token.keys_dir,
+        active_kid=envs.token.active_kid
+    )
+    claims_codec = ClaimsCodec(strict=envs.token.strict_claims)
+    token_cache: VerifiedTokenCache[UserClaims] = VerifiedTokenCache(
+        maxsize=envs.token.cache_size,
+        ttl=envs.token.cache_ttl
+    )
     TOKEN_ALIVE_HOURS = datetime.timedelta(hours=envs.token.alive_hours)
     REFRESH_TOKEN_ALIVE_HOURS = datetime.timedelta(hours=envs.token.refresh_alive_hours)
 
@@ -29,11 +43,68 @@ class JWTGenerator:
 
     @classmethod
     def _encode_jwt(cls, data: dict) -> str:
-        return jwt.encode(data, key=cls.JWT_SECRET, algorithm=cls.DEFAULT_ALGORITHM)
+        key = cls.key_storage.signing_key
+        return jwt.encode(data, key=key.private_key, algorithm=key.algorithm, headers={'kid': key.kid})
 
     @classmethod
     def _decode_jwt(cls, token: str) -> dict:
-        return jwt.decode(token, cls.JWT_SECRET, algorithms=[cls.DEFAULT_ALGORITHM])
+        kid = jwt.get_unverified_header(token).get('kid')
+        key = cls.key_storage.get(kid)
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+
+    @classmethod
+    def generate_token_id(cls) -> str:
+        """
+        Генерирует компактный уникальный идентификатор токена (``jti``)
+        """
+        return secrets.token_urlsafe(16)
+
+    @classmethod
+    def _get_unverified_claims(cls, token: Token) -> dict:
+        try:
+            return jwt.decode(token, options={'verify_signature': False})
+        except jwt.InvalidTokenError:
+            return {}
+
+    @classmethod
+    def get_token_id(cls, token: Token) -> str:
+        """
+        Получает идентификатор токена, по которому токен блокируется.
+
+        Подпись токена не проверяется. Для токенов без ``jti`` (выпущенных до его появления)
+        идентификатором служит сам токен
+        """
+        return cls._get_unverified_claims(token).get('jti') or token
+
+    @classmethod
+    def get_revocation_info(cls, token: Token) -> TokenRevocationInfo:
+        """
+        Получает данные для проверки блокировки access или refresh токена.
+
+        Подпись токена не проверяется: данные передаются в ``BlockedJWTStorage.is_revoked`` только
+        для токенов, прошедших проверку (иначе по поддельному ``sub`` выполнялись бы запросы к БД)
+        """
+        claims = cls._get_unverified_claims(token)
+        user_id = claims.get('sub') or claims.get('user_id')
+        issued_at = claims.get('iat')
+
+        return TokenRevocationInfo(
+            token_id=claims.get('jti') or token,
+            user_id=str(user_id) if user_id else None,
+            issued_at=issued_at if isinstance(issued_at, (int, float)) else None
+        )
+
+    @classmethod
+    def get_token_expired_at(cls, token: Token) -> float | None:
+        """
+        Получает время истечения токена (unix timestamp) для access и refresh токенов.
+
+        Подпись токена не проверяется
+        """
+        claims = cls._get_unverified_claims(token)
+        expired_at = claims.get('exp') or claims.get('expired_at')
+
+        return expired_at if isinstance(expired_at, (int, float)) else None
 
     @classmethod
     @trace_request('create_jwt_token', logger)
@@ -45,59 +116,87 @@ class JWTGenerator:
         :param refresh_token: refresh-токен
         :return: кортеж из access и refresh-токенов
         """
-        user = UserInfoJWT(**user.dict())
-        created_at = datetime.datetime.utcnow()
-        expired_at = created_at + cls.TOKEN_ALIVE_HOURS
-        refresh_expired_at = (created_at + cls.REFRESH_TOKEN_ALIVE_HOURS)
+        issued_at = int(time.time())
+        expired_at = issued_at + int(cls.TOKEN_ALIVE_HOURS.total_seconds())
+        refresh_expired_at = issued_at + int(cls.REFRESH_TOKEN_ALIVE_HOURS.total_seconds())
 
         if not refresh_token:
-            refresh_info = RefreshTokenInfoIn(user_id=user.id, exp=refresh_expired_at).dict()
+            refresh_info = cls.claims_codec.encode_refresh(
+                user_id=user.id,
+                expired_at=refresh_expired_at,
+                issued_at=issued_at,
+                token_id=cls.generate_token_id()
+            )
             refresh_token = cls._encode_jwt(refresh_info)
 
-        token_info = TokenInfo(user=user, exp=expired_at, iat=created_at)
+        token_info = cls.claims_codec.encode_access(user, expired_at, issued_at, cls.generate_token_id())
 
-        token = cls._encode_jwt(token_info.dict(by_alias=True))
+        token = cls._encode_jwt(token_info)
 
         return token, refresh_token
 
     @classmethod
-    def parse_jwt(cls, token: Token) -> TokenInfo | None:
+    def parse_jwt(cls, token: Token) -> AccessTokenClaims | None:
         """
         Получает информацию из jwt токена
         """
         decoded_jwt = None
         try:
             decoded_jwt = cls._decode_jwt(token)
-            user_info = TokenInfo(**decoded_jwt)
+            user_info = cls.claims_codec.decode_access(decoded_jwt)
 
             return user_info
         except (jwt.InvalidTokenError, jwt.exceptions.InvalidSignatureError) as e:
             cls.logger.debug(f'Failed to decode token: "{token}"; {str(e)}')
-        except ValidationError as e:
+        except ValueError as e:
             cls.logger.debug(f'Got some unparsed dict from token "{decoded_jwt}"; {str(e)}')
 
         return None
 
     @classmethod
     @trace_request('validate_jwt_token', logger)
-    def validate_jwt(cls, token: Token) -> UserInfoJWT:
+    def validate_jwt(cls, token: Token) -> UserClaims:
         """
-        Проверяет jwt токен на валидность и возвращает информацию о пользователе
+        Проверяет jwt токен на валидность и возвращает информацию о пользователе.
+
+        Результат проверки кэшируется в памяти процесса до истечения срока действия токена
 
         :raises NotAuthorized
         """
+        return cls._validate_jwt(token)
+
+    @classmethod
+    @trace_request('validate_jwt_tokens', logger)
+    def validate_jwt_many(cls, tokens: list[Token]) -> list[UserClaims | NotAuthorized]:
+        """
+        Проверяет набор jwt токенов на валидность
+
+        :return: информация о пользователе либо ошибка авторизации для каждого из токенов (в порядке передачи)
+        """
+        result = []
+        for token in tokens:
+            try:
+                result.append(cls._validate_jwt(token))
+            except NotAuthorized as e:
+                result.append(e)
+
+        return result
+
+    @classmethod
+    def _validate_jwt(cls, token: Token) -> UserClaims:
+        cached_user = cls.token_cache.get(token)
+        if cached_user is not None:
+            return cached_user
+
         user_info = cls.parse_jwt(token)
 
         if not user_info:
             raise NotAuthorized(ExceptionMessages.incorrect_token())
 
-        expired_at = datetime.datetime.fromtimestamp(
-            user_info.token_expired_at,
-            tz=datetime.timezone.utc
-        ).replace(tzinfo=None)
-
-        current_time = datetime.datetime.utcnow()
-        if expired_at < current_time:
+        if user_info.token_expired_at < time.time():
             raise NotAuthorized(ExceptionMessages.expired_token())
 
-        return UserInfoJWT(**user_info.user.dict())
+        user = user_info.user
+        cls.token_cache.add(token, user, user_info.token_expired_at, token_id=user_info.token_id)
+
+        return user
@@ -0,0 +1,145 @@
+import json
+import pathlib
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import get_default_algorithms
+
+SYMMETRIC_ALGORITHMS = {'HS256', 'HS384', 'HS512'}
+DEFAULT_KID = 'default'
+
+
+class SigningKey:
+    """
+    Ключ подписи JWT токенов
+    """
+
+    def __init__(self, kid: str, algorithm: str, private_key, public_key):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.private_key = private_key
+        self.public_key = public_key
+
+    @property
+    def is_symmetric(self) -> bool:
+        return self.algorithm in SYMMETRIC_ALGORITHMS
+
+    def to_jwk(self) -> dict:
+        """
+        Публичная часть ключа в формате JWK (RFC 7517)
+        """
+        algorithm = get_default_algorithms()[self.algorithm]
+        jwk = json.loads(algorithm.to_jwk(self.public_key))
+        jwk.pop('key_ops', None)
+        jwk.update(kid=self.kid, alg=self.algorithm, use='sig')
+
+        return jwk
+
+
+class JWTKeyStorage:
+    """
+    Хранилище ключей для подписи и проверки JWT токенов.
+
+    Для симметричных алгоритмов используется единственный общий секрет.
+    Для асимметричных алгоритмов ключи загружаются из директории (файлы ``<kid>.pem``): новые токены
+    подписываются активным ключом, а проверяются любым из загруженных, что позволяет ротировать ключи,
+    не инвалидируя ранее выданные токены
+    """
+
+    def __init__(
+            self,
+            algorithm: str,
+            secret: str | None = None,
+            keys_dir: str | None = None,
+            active_kid: str | None = None,
+    ):
+        """
+        :param algorithm: алгоритм подписи токенов
+        :param secret: общий секрет (для симметричных алгоритмов)
+        :param keys_dir: директория с приватными ключами в формате PEM (для асимметричных алгоритмов)
+        :param active_kid: идентификатор ключа, которым подписываются новые токены
+        """
+        self.algorithm = algorithm
+
+        if algorithm in SYMMETRIC_ALGORITHMS:
+            self.keys = {DEFAULT_KID: SigningKey(DEFAULT_KID, algorithm, secret, secret)}
+        else:
+            self.keys = self._load_keys(algorithm, keys_dir)
+
+        self.active_kid = active_kid or sorted(self.keys)[-1]
+
+        if self.active_kid not in self.keys:
+            raise ValueError(f'Signing key "{self.active_kid}" not found')
+
+    @property
+    def signing_key(self) -> SigningKey:
+        """
+        Ключ, которым подписываются новые токены
+        """
+        return self.keys[self.active_kid]
+
+    @property
+    def algorithms(self) -> list[str]:
+        """
+        Перечень алгоритмов, допустимых при проверке токенов
+        """
+        return [self.algorithm]
+
+    def get(self, kid: str | None) -> SigningKey:
+        """
+        Получение ключа по его идентификатору из заголовка токена.
+
+        Токены без ``kid`` (выпущенные до ротации ключей) проверяются активным ключом
+
+        :raises jwt.InvalidSignatureError: при неизвестном идентификаторе ключа
+        """
+        key = self.keys.get(kid or self.active_kid)
+
+        if key is None:
+            raise jwt.InvalidSignatureError(f'Unknown signing key "{kid}"')
+
+        return key
+
+    def jwks(self) -> dict:
+        """
+        Набор публичных ключей (JWKS) для локальной проверки токенов сторонними сервисами.
+
+        Симметричные ключи не публикуются
+        """
+        keys = [key.to_jwk() for key in self.keys.values() if not key.is_symmetric]
+
+        return {'keys': keys}
+
+    @classmethod
+    def _load_keys(cls, algorithm: str, keys_dir: str | None) -> dict[str, SigningKey]:
+        if not keys_dir:
+            raise ValueError(f'Keys directory is required for "{algorithm}" algorithm')
+
+        keys = {}
+        for path in sorted(pathlib.Path(keys_dir).glob('*.pem')):
+            private_key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+            keys[path.stem] = SigningKey(path.stem, algorithm, private_key, private_key.public_key())
+
+        if not keys:
+            raise ValueError(f'No signing keys found in "{keys_dir}"')
+
+        return keys
+
+
+def generate_private_key(algorithm: str) -> bytes:
+    """
+    Генерация нового приватного ключа в формате PEM для указанного алгоритма
+    """
+    if algorithm == 'EdDSA':
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    elif algorithm.startswith(('RS', 'PS')):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        raise ValueError(f'Key generation is not supported for "{algorithm}" algorithm')
+
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
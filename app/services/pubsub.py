@@ -0,0 +1,83 @@
+import threading
+import time
+from typing import Callable
+
+from redis.exceptions import RedisError
+
+from core.logger import get_logger
+from services.cache import RedisCache
+
+logger = get_logger(__name__)
+
+
+class ChannelListener:
+    """
+    Фоновое чтение сообщений канала Redis pub/sub с автоматическим переподключением
+    """
+
+    def __init__(
+            self,
+            cache: RedisCache,
+            channel: str,
+            handler: Callable[[str], None],
+            on_connect: Callable[[], None] | None = None,
+            on_disconnect: Callable[[], None] | None = None,
+            poll_timeout: float = 1.0,
+            retry_delay: float = 1.0,
+    ):
+        """
+        :param cache: хранилище, через которое выполняется подписка
+        :param channel: канал
+        :param handler: обработчик сообщения
+        :param on_connect: вызывается после (пере)подписки на канал, например для полной синхронизации
+        :param on_disconnect: вызывается при потере соединения
+        :param poll_timeout: время ожидания сообщения за одну итерацию (сек.); чтение с таймаутом, а не
+                             блокирующее, т.к. у соединений пула ограничено время операций
+        :param retry_delay: пауза перед переподключением (сек.)
+        """
+        self.cache = cache
+        self.channel = channel
+        self.handler = handler
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self.poll_timeout = poll_timeout
+        self.retry_delay = retry_delay
+
+        self._started = False
+
+    def start(self):
+        """
+        Запуск чтения канала в фоновом потоке (повторный вызов ничего не делает)
+        """
+        if self._started:
+            return
+
+        self._started = True
+        threading.Thread(target=self._listen, name=f'listener-{self.channel}', daemon=True).start()
+
+    def publish(self, message: str):
+        self.cache.publish(self.channel, message)
+
+    def _listen(self):
+        while True:
+            pubsub = self.cache.pubsub()
+            try:
+                pubsub.subscribe(self.channel)
+                # синхронизация после подписки, чтобы не потерять изменения между ними
+                if self.on_connect is not None:
+                    self.on_connect()
+
+                while True:
+                    message = pubsub.get_message(timeout=self.poll_timeout)
+                    if message is not None and message['type'] == 'message':
+                        data = message['data']
+                        self.handler(data.decode() if isinstance(data, bytes) else data)
+            except (RedisError, OSError) as e:
+                logger.warning(f'Lost subscription to "{self.channel}": {e}')
+                if self.on_disconnect is not None:
+                    self.on_disconnect()
+            finally:
+                # соединение подписки возвращается в общий пул
+                pubsub.close()
+
+            time.sleep(self.retry_delay)
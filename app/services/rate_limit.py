@@ -0,0 +1,393 @@
+import threading
+import time
+from typing import NamedTuple, Protocol
+
+from redis.client import Redis
+from redis.exceptions import RedisError
+
+from core.logger import get_logger
+from services.circuit_breaker import CircuitBreaker
+
+logger = get_logger(__name__)
+
+# Все скрипты принимают ARGV: лимит, длительность периода (мс), количество запрашиваемых запросов,
+# допустимый всплеск - и возвращают количество выданных запросов (не больше запрошенного), остаток,
+# время до сброса лимита (мс) и время до следующей попытки, если ничего не выдано (мс).
+# Отрицательное количество запрашиваемых запросов возвращает неизрасходованные запросы в текущий период.
+
+# Фиксированное окно: окно начинается с первого запроса
+FIXED_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+
+local count = tonumber(redis.call('GET', KEYS[1])) or 0
+if tonumber(ARGV[3]) < 0 then
+    if count > 0 then
+        redis.call('DECRBY', KEYS[1], math.min(-tonumber(ARGV[3]), count))
+    end
+    return {0, 0, 0, 0}
+end
+
+local granted = math.max(0, math.min(tonumber(ARGV[3]), limit - count))
+if granted > 0 then
+    count = redis.call('INCRBY', KEYS[1], granted)
+end
+
+local reset = redis.call('PTTL', KEYS[1])
+if reset == -1 then
+    redis.call('PEXPIRE', KEYS[1], period)
+    reset = period
+end
+reset = math.max(reset, 0)
+
+local retry = 0
+if granted == 0 then
+    retry = reset
+end
+
+return {granted, math.max(0, limit - count), reset, retry}
+"""
+
+# Скользящее окно: счётчики текущего и предыдущего окон в одном hash, предыдущее учитывается с весом
+# непрошедшей части текущего окна
+SLIDING_WINDOW_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local window = math.floor(now / period)
+
+local data = redis.call('HMGET', KEYS[1], 'window', 'current', 'previous')
+local stored_window = tonumber(data[1]) or window
+local current = tonumber(data[2]) or 0
+local previous = tonumber(data[3]) or 0
+
+if tonumber(ARGV[3]) < 0 then
+    if stored_window == window and current > 0 then
+        redis.call('HSET', KEYS[1], 'current', math.max(0, current + tonumber(ARGV[3])))
+    end
+    return {0, 0, 0, 0}
+end
+
+if stored_window ~= window then
+    if stored_window == window - 1 then
+        previous = current
+    else
+        previous = 0
+    end
+    current = 0
+end
+
+local elapsed = now - window * period
+local available = math.floor(limit - previous * (1 - elapsed / period) - current)
+local granted = math.max(0, math.min(tonumber(ARGV[3]), available))
+current = current + granted
+
+redis.call('HSET', KEYS[1], 'window', window, 'current', current, 'previous', previous)
+redis.call('PEXPIRE', KEYS[1], period * 2)
+
+local retry = 0
+if granted == 0 then
+    retry = period - elapsed
+end
+
+return {granted, math.max(0, available - granted), period - elapsed, retry}
+"""
+
+# GCRA (эквивалент token bucket): хранится только теоретическое время прихода следующего запроса (TAT)
+GCRA_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local interval = tonumber(ARGV[2]) / tonumber(ARGV[1])
+local burst_offset = interval * tonumber(ARGV[4])
+
+local tat = math.max(tonumber(redis.call('GET', KEYS[1])) or now, now)
+if tonumber(ARGV[3]) < 0 then
+    tat = math.max(now, tat + tonumber(ARGV[3]) * interval)
+    if tat > now then
+        redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil(tat - now))
+    else
+        redis.call('DEL', KEYS[1])
+    end
+    return {0, 0, 0, 0}
+end
+
+local available = math.floor((now - tat + burst_offset) / interval + 1e-9)
+local granted = math.max(0, math.min(tonumber(ARGV[3]), available))
+
+if granted > 0 then
+    tat = tat + granted * interval
+    redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil(tat - now))
+end
+
+local retry = 0
+if granted == 0 then
+    retry = math.ceil(tat + interval - burst_offset - now)
+end
+
+return {granted, math.max(0, available - granted), math.ceil(tat - now), retry}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    """
+    Результат учёта запроса
+    """
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float = 0
+
+
+class RateLimitPolicy(Protocol):
+    def hit(self, key: str, limit: int, period: int, burst: int | None = None) -> RateLimitResult:
+        """
+        Учёт запроса
+
+        :param key: ключ счётчика
+        :param limit: количество запросов за период
+        :param period: длительность периода (сек.)
+        :param burst: допустимый всплеск запросов (для алгоритмов, которые его поддерживают)
+        """
+
+
+class ScriptPolicy:
+    """
+    Алгоритм ограничения, выполняемый одним атомарным вызовом Lua скрипта (``EVALSHA``)
+    """
+    script_source: str
+
+    def __init__(self, client: Redis, breaker: CircuitBreaker | None = None):
+        """
+        :param client: клиент Redis
+        :param breaker: предохранитель, через который выполняются вызовы скрипта
+        """
+        self.client = client
+        self.breaker = breaker
+        self.script = client.register_script(self.script_source)
+
+    def load(self):
+        """
+        Загрузка скрипта в Redis (при его отсутствии скрипт будет загружен при первом вызове)
+        """
+        try:
+            self.script.sha = self.client.script_load(self.script_source)
+        except RedisError as e:
+            logger.warning(f'Failed to load rate limit script ({type(self).__name__}): {e}')
+
+    def acquire(
+            self,
+            key: str,
+            limit: int,
+            period: int,
+            burst: int | None = None,
+            requested: int = 1,
+    ) -> tuple[int, RateLimitResult]:
+        """
+        Резервирование нескольких запросов за один вызов
+
+        :param requested: количество резервируемых запросов
+        :return: количество выданных запросов (от 0 до ``requested``) и результат учёта
+        """
+        keys, args = [key], [limit, period * 1000, requested, burst or limit]
+        if self.breaker is None:
+            granted, remaining, reset, retry = self.script(keys=keys, args=args)
+        else:
+            granted, remaining, reset, retry = self.breaker.call(self.script, keys=keys, args=args)
+        granted = int(granted)
+        result = RateLimitResult(
+            allowed=granted > 0,
+            limit=self.get_limit(limit, burst),
+            remaining=int(remaining),
+            reset_after=int(reset) / 1000,
+            retry_after=int(retry) / 1000
+        )
+
+        return granted, result
+
+    def release(self, key: str, limit: int, period: int, burst: int | None = None, tokens: int = 1):
+        """
+        Возврат зарезервированных, но неизрасходованных запросов в текущий период
+
+        :param tokens: количество возвращаемых запросов
+        """
+        keys, args = [key], [limit, period * 1000, -tokens, burst or limit]
+        if self.breaker is None:
+            self.script(keys=keys, args=args)
+        else:
+            self.breaker.call(self.script, keys=keys, args=args)
+
+    def hit(self, key: str, limit: int, period: int, burst: int | None = None) -> RateLimitResult:
+        _, result = self.acquire(key, limit, period, burst)
+        return result
+
+    def get_limit(self, limit: int, burst: int | None = None) -> int:
+        return limit
+
+
+class FixedWindowPolicy(ScriptPolicy):
+    """
+    Фиксированное окно: не более ``limit`` запросов за окно, отсчитываемое от первого запроса
+    """
+    script_source = FIXED_WINDOW_SCRIPT
+
+
+class SlidingWindowPolicy(ScriptPolicy):
+    """
+    Скользящее окно (приближённое по счётчикам двух соседних окон): сглаживает всплески на границе окон
+    """
+    script_source = SLIDING_WINDOW_SCRIPT
+
+
+class GCRAPolicy(ScriptPolicy):
+    """
+    GCRA (token bucket): запросы равномерно распределяются по периоду, допускается всплеск до ``burst``
+    запросов (по умолчанию - ``limit``)
+    """
+    script_source = GCRA_SCRIPT
+
+    def get_limit(self, limit: int, burst: int | None = None) -> int:
+        return burst or limit
+
+
+class Lease:
+    """
+    Зарезервированные воркером запросы по одному ключу
+    """
+    __slots__ = ('tokens', 'remaining', 'limit', 'expires_at', 'reset_at', 'retry_at')
+
+    def __init__(
+            self,
+            tokens: int,
+            remaining: int,
+            limit: int,
+            expires_at: float,
+            reset_at: float,
+            retry_at: float = 0,
+    ):
+        self.tokens = tokens
+        self.remaining = remaining
+        self.limit = limit
+        self.expires_at = expires_at
+        self.reset_at = reset_at
+        self.retry_at = retry_at
+
+
+class LeasedPolicy:
+    """
+    Локальный (в памяти воркера) уровень ограничения поверх глобального счётчика в Redis.
+
+    Воркер резервирует в Redis сразу пачку запросов - долю ``share`` от известного остатка глобального лимита -
+    и расходует её локально, не обращаясь в Redis. По мере приближения к лимиту пачки уменьшаются до одного
+    запроса, поэтому лимит остаётся глобальным и точным у границы.
+
+    Неизрасходованные за ``lease_ttl`` запросы возвращаются в Redis при следующем обращении к ключу, если период
+    лимита ещё не сброшен, а размер следующей пачки считается от последнего известного остатка. Пока воркер
+    не обратился к ключу повторно, его неизрасходованный резерв остаётся недоступен другим воркерам
+    """
+
+    def __init__(
+            self,
+            policy: ScriptPolicy,
+            share: float,
+            lease_ttl: float = 1,
+            max_batch: int = 1000,
+            max_keys: int = 10000,
+    ):
+        """
+        :param policy: алгоритм глобального ограничения
+        :param share: доля известного остатка лимита, резервируемая за одно обращение к Redis
+        :param lease_ttl: максимальное время жизни зарезервированных запросов (сек.)
+        :param max_batch: максимальное количество запросов, резервируемых за одно обращение
+        :param max_keys: количество ключей, после которого из памяти удаляются истёкшие резервы
+        """
+        self.policy = policy
+        self.share = share
+        self.lease_ttl = lease_ttl
+        self.max_batch = max_batch
+        self.max_keys = max_keys
+
+        self._leases: dict[str, Lease] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, period: int, burst: int | None = None) -> RateLimitResult:
+        now = time.monotonic()
+
+        with self._lock:
+            lease = self._leases.get(key)
+            expired, released = None, 0
+            if lease is not None and lease.expires_at <= now:
+                expired, lease = lease, None
+                # неизрасходованный резерв возвращается один раз и только в пределах своего периода
+                if expired.reset_at > now:
+                    released, expired.tokens = expired.tokens, 0
+
+            if lease is not None and lease.tokens > 0:
+                lease.tokens -= 1
+                return RateLimitResult(
+                    True,
+                    lease.limit,
+                    lease.remaining + lease.tokens,
+                    max(0.0, lease.reset_at - now)
+                )
+
+            # лимит исчерпан: до следующей возможной попытки запросы отклоняются без обращения в Redis
+            if lease is not None and lease.retry_at > now:
+                return RateLimitResult(False, lease.limit, 0, max(0.0, lease.reset_at - now), lease.retry_at - now)
+
+        if released:
+            self._release(key, limit, period, burst, released)
+
+        if lease is not None:
+            known_remaining = lease.remaining
+        elif expired is not None and expired.reset_at > now:
+            known_remaining = expired.remaining + released
+        else:
+            known_remaining = self.policy.get_limit(limit, burst)
+        requested = max(1, min(int(known_remaining * self.share), self.max_batch))
+        granted, result = self.policy.acquire(key, limit, period, burst, requested)
+
+        with self._lock:
+            if len(self._leases) >= self.max_keys:
+                self._leases = {k: v for k, v in self._leases.items() if v.expires_at > now}
+
+            current, replaced = self._leases.get(key), 0
+            if current is not None and current.expires_at > now and current.tokens > 0:
+                # другой поток успел зарезервировать запросы по этому ключу: выданные добавляются в его резерв
+                current.tokens += max(0, granted - 1)
+                current.remaining = min(current.remaining, result.remaining)
+            else:
+                # неизрасходованный остаток заменяемого резерва возвращается в Redis
+                if current is not None and current.reset_at > now:
+                    replaced = current.tokens
+
+                self._leases[key] = Lease(
+                    tokens=max(0, granted - 1),
+                    remaining=result.remaining,
+                    limit=result.limit,
+                    expires_at=now + min(self.lease_ttl, result.reset_after or self.lease_ttl),
+                    reset_at=now + result.reset_after,
+                    retry_at=now + min(self.lease_ttl, result.retry_after) if not granted else 0
+                )
+
+        if replaced:
+            self._release(key, limit, period, burst, replaced)
+
+        if granted > 1:
+            result = result._replace(remaining=result.remaining + granted - 1)
+
+        return result
+
+    def _release(self, key: str, limit: int, period: int, burst: int | None, tokens: int):
+        try:
+            self.policy.release(key, limit, period, burst, tokens)
+        except RedisError as e:
+            logger.warning(f'Failed to release leased rate limit tokens: {e}')
+
+
+RATE_LIMIT_POLICIES: dict[str, type[ScriptPolicy]] = {
+    'fixed_window': FixedWindowPolicy,
+    'sliding_window': SlidingWindowPolicy,
+    'gcra': GCRAPolicy,
+}
@@ -0,0 +1,128 @@
+import threading
+import time
+
+from redis.connection import BlockingConnectionPool
+from redis.exceptions import ConnectionError, RedisError
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    Ограниченный пул соединений с Redis со статистикой использования.
+
+    При исчерпании пула запрос ждёт освободившееся соединение не дольше ``timeout`` секунд,
+    время ожидания (вместе с установкой нового соединения) учитывается в статистике
+    """
+
+    def reset(self):
+        super().reset()
+
+        self._stats_lock = threading.Lock()
+        self.in_use = 0
+        self.max_in_use = 0
+        self.acquired = 0
+        self.errors = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def get_connection(self, command_name, *keys, **options):
+        started_at = time.perf_counter()
+
+        try:
+            connection = super().get_connection(command_name, *keys, **options)
+        except ConnectionError:
+            with self._stats_lock:
+                self.errors += 1
+            raise
+
+        wait_time = time.perf_counter() - started_at
+
+        with self._stats_lock:
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.acquired += 1
+            self.wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+        return connection
+
+    def release(self, connection):
+        super().release(connection)
+
+        with self._stats_lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def warm_up(self, size: int):
+        """
+        Заблаговременное открытие соединений (чтобы первые запросы не тратили время на подключение)
+
+        :param size: количество открываемых соединений
+        """
+        connections = []
+        try:
+            for _ in range(min(size, self.max_connections)):
+                connections.append(self.get_connection('PING'))
+        except RedisError as e:
+            logger.warning(f'Failed to warm up Redis connection pool: {e}')
+        finally:
+            for connection in connections:
+                self.release(connection)
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Статистика использования пула
+        """
+        with self._stats_lock:
+            return {
+                'max_connections': self.max_connections,
+                'created': len(self._connections),
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'acquired': self.acquired,
+                'errors': self.errors,
+                'avg_wait_ms': round(self.wait_time / self.acquired * 1000, 3) if self.acquired else 0,
+                'max_wait_ms': round(self.max_wait_time * 1000, 3),
+            }
+
+
+def create_redis_pool(
+        host: str,
+        port: int,
+        password: str | None = None,
+        min_size: int = 0,
+        max_size: int = 20,
+        timeout: float = 1,
+        socket_timeout: float | None = None,
+        socket_connect_timeout: float | None = None,
+        health_check_interval: int = 0,
+) -> InstrumentedConnectionPool:
+    """
+    Создание пула соединений, общего для всех пользователей Redis в процессе
+
+    :param host: хост Redis
+    :param port: порт Redis
+    :param password: пароль Redis
+    :param min_size: количество соединений, открываемых при создании пула
+    :param max_size: максимальное количество соединений
+    :param timeout: максимальное время ожидания свободного соединения (сек.)
+    :param socket_timeout: таймаут операций с сокетом (сек.)
+    :param socket_connect_timeout: таймаут установки соединения (сек.)
+    :param health_check_interval: период проверки простаивающих соединений (сек.)
+    """
+    pool = InstrumentedConnectionPool(
+        max_connections=max_size,
+        timeout=timeout,
+        host=host,
+        port=port,
+        password=password,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=socket_connect_timeout,
+        health_check_interval=health_check_interval,
+    )
+    if min_size:
+        pool.warm_up(min_size)
+
+    return pool
@@ -0,0 +1,236 @@
+import hashlib
+import math
+import threading
+import time
+
+from redis.exceptions import RedisError
+
+from core.logger import get_logger
+from services.cache import RedisCache
+from services.pubsub import ChannelListener
+
+logger = get_logger(__name__)
+
+
+class BloomFilter:
+    """
+    Компактное вероятностное множество строк.
+
+    Отсутствие элемента определяется точно, присутствие - с вероятностью ложного срабатывания ``error_rate``
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        :param capacity: ожидаемое количество элементов
+        :param error_rate: допустимая вероятность ложного срабатывания при ``capacity`` элементах
+        """
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def _positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationFilter:
+    """
+    Локальная (в памяти воркера) копия блоклиста токенов.
+
+    Содержит Bloom-фильтр идентификаторов заблокированных токенов и эпохи отзыва токенов пользователей.
+    Синхронизируется с Redis через pub/sub (изменения) и периодические полные снимки (которые также
+    избавляют фильтр от истёкших записей). Пока фильтр не синхронизирован, все проверки идут в Redis
+    """
+
+    def __init__(
+            self,
+            cache: RedisCache,
+            key_prefix: str,
+            epoch_key_prefix: str,
+            channel: str = 'blocked_jwt:events',
+            capacity: int = 1_000_000,
+            error_rate: float = 0.001,
+            snapshot_interval: int = 300,
+            batch_size: int = 1000,
+    ):
+        """
+        :param cache: хранилище заблокированных токенов
+        :param key_prefix: префикс ключей заблокированных токенов
+        :param epoch_key_prefix: префикс ключей эпох отзыва токенов пользователей
+        :param channel: канал pub/sub для рассылки изменений блоклиста
+        :param capacity: ожидаемое количество заблокированных токенов
+        :param error_rate: допустимая доля лишних запросов в Redis
+        :param snapshot_interval: период полной синхронизации с Redis (сек.)
+        :param batch_size: количество ключей, получаемых за один запрос при синхронизации
+        """
+        self.cache = cache
+        self.key_prefix = key_prefix
+        self.epoch_key_prefix = epoch_key_prefix
+        self.channel = channel
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.snapshot_interval = snapshot_interval
+        self.batch_size = batch_size
+
+        self.is_ready = False
+        self.checks = 0
+        self.skipped = 0
+
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._epochs: dict[str, float] = {}
+        self._pending: list[str] | None = None
+        self._lock = threading.Lock()
+        self._started = False
+        self._listener = ChannelListener(
+            cache,
+            channel,
+            self._handle_event,
+            on_connect=self.snapshot,
+            on_disconnect=self._on_disconnect
+        )
+
+    def maybe_revoked(self, token_id: str, user_id: str | None = None) -> bool:
+        """
+        Может ли токен быть заблокирован. ``False`` означает, что токен точно не заблокирован
+        и обращаться в Redis не нужно
+        """
+        self.checks += 1
+
+        # токены без jti (старого формата) хранятся в том числе без префикса и в снимок не попадают
+        is_maybe_revoked = (
+                not self.is_ready
+                or '.' in token_id
+                or token_id in self._bloom
+                or (user_id is not None and user_id in self._epochs)
+        )
+
+        if not is_maybe_revoked:
+            self.skipped += 1
+
+        return is_maybe_revoked
+
+    def publish_tokens(self, token_ids: list[str]):
+        """
+        Рассылка всем воркерам информации о блокировке токенов (одним сообщением)
+        """
+        self._listener.publish(f't:{" ".join(token_ids)}')
+
+    def publish_epoch(self, user_id: str, revoked_before: float):
+        """
+        Рассылка всем воркерам информации об отзыве токенов пользователя
+        """
+        self._listener.publish(f'u:{user_id}:{revoked_before!r}')
+
+    def start(self):
+        """
+        Запуск фоновой синхронизации с Redis
+        """
+        if self._started:
+            return
+
+        self._started = True
+        self._listener.start()
+        threading.Thread(target=self._refresh, name='revocation-filter-snapshot', daemon=True).start()
+
+    def snapshot(self):
+        """
+        Полная пересборка фильтра по текущему содержимому Redis
+        """
+        with self._lock:
+            self._pending = []
+
+        try:
+            bloom = BloomFilter(self.capacity, self.error_rate)
+            for keys in self.cache.scan(f'{self.key_prefix}*', self.batch_size):
+                for key in keys:
+                    bloom.add(self._strip_hash_tag(self._decode(key)[len(self.key_prefix):]))
+
+            epochs = {}
+            for keys in self.cache.scan(f'{self.epoch_key_prefix}*', self.batch_size):
+                for key, value in zip(keys, self.cache.get_many(keys)):
+                    if value is not None and float(value):
+                        epochs[self._strip_hash_tag(self._decode(key)[len(self.epoch_key_prefix):])] = float(value)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for event in self._pending:
+                self._apply(event, bloom, epochs)
+
+            self._bloom = bloom
+            self._epochs = epochs
+            self._pending = None
+            self.is_ready = True
+
+        if bloom.count > self.capacity:
+            logger.warning(f'Revocation filter is over capacity: {bloom.count} > {self.capacity}')
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            'is_ready': self.is_ready,
+            'tokens': self._bloom.count,
+            'users': len(self._epochs),
+            'checks': self.checks,
+            'skipped': self.skipped,
+        }
+
+    def _handle_event(self, event: str):
+        with self._lock:
+            self._apply(event, self._bloom, self._epochs)
+            if self._pending is not None:
+                self._pending.append(event)
+
+    def _on_disconnect(self):
+        self.is_ready = False
+
+    def _refresh(self):
+        while True:
+            time.sleep(self.snapshot_interval)
+            if not self.is_ready:
+                continue
+
+            try:
+                self.snapshot()
+            except (RedisError, OSError) as e:
+                logger.warning(f'Failed to refresh revocation filter: {e}')
+
+    @staticmethod
+    def _apply(event: str, bloom: BloomFilter, epochs: dict[str, float]):
+        kind, _, value = event.partition(':')
+
+        if kind == 't':
+            for token_id in value.split(' '):
+                bloom.add(token_id)
+        elif kind == 'u':
+            user_id, _, revoked_before = value.rpartition(':')
+            epochs[user_id] = max(epochs.get(user_id, 0), float(revoked_before))
+
+    @staticmethod
+    def _strip_hash_tag(key: str) -> str:
+        """
+        Идентификатор из ключа с hash tag пользователя (``{user_id}:token_id`` или ``{user_id}``)
+        """
+        if not key.startswith('{'):
+            return key
+
+        user_id, _, token_id = key[1:].partition('}')
+        return token_id[1:] if token_id else user_id
+
+    @staticmethod
+    def _decode(value: bytes | str) -> str:
+        return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,106 @@
+import hashlib
+from typing import NamedTuple
+
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Query
+
+from core.constants import COUNT_STRATEGY
+from core.logger import get_logger
+from services.cache import RedisCache
+
+logger = get_logger(__name__)
+
+
+class RowsCount(NamedTuple):
+    """
+    Количество записей и способ, которым оно получено
+    """
+    value: int
+    strategy: COUNT_STRATEGY
+
+
+class RowCounter:
+    """
+    Подсчёт количества записей запроса для пагинации.
+
+    - ``exact`` - ``SELECT count(*)`` по запросу;
+    - ``estimated`` - оценка планировщика PostgreSQL (``EXPLAIN``, по статистике ``pg_class.reltuples``
+      и выборочности фильтров) без чтения таблицы; если оценка меньше ``estimate_threshold``, записи
+      пересчитываются точно (на малых выборках оценка неточна, а точный подсчёт дёшев);
+    - ``cached`` - точный подсчёт, результат которого хранится в Redis ``cache_ttl`` секунд по отпечатку
+      запроса (текст SQL и параметры). При недоступности Redis записи считаются точно
+    """
+
+    def __init__(
+            self,
+            cache: RedisCache | None = None,
+            key_prefix: str = 'rows_count:',
+            cache_ttl: int = 30,
+            estimate_threshold: int = 10000,
+    ):
+        """
+        :param cache: хранилище результатов подсчёта (без него ``cached`` работает как ``exact``)
+        :param key_prefix: префикс ключей результатов подсчёта в Redis
+        :param cache_ttl: время хранения результата подсчёта (сек.)
+        :param estimate_threshold: оценка, ниже которой записи пересчитываются точно
+        """
+        self.cache = cache
+        self.key_prefix = key_prefix
+        self.cache_ttl = cache_ttl
+        self.estimate_threshold = estimate_threshold
+
+    def count(self, query: Query, strategy: COUNT_STRATEGY = COUNT_STRATEGY.exact) -> RowsCount:
+        """
+        Количество записей запроса
+
+        :param query: запрос (без limit/offset)
+        :param strategy: желаемый способ подсчёта; фактически использованный способ - в результате
+        """
+        if strategy == COUNT_STRATEGY.estimated:
+            return self._estimate(query)
+
+        if strategy == COUNT_STRATEGY.cached and self.cache is not None:
+            return self._count_cached(query)
+
+        return RowsCount(query.count(), COUNT_STRATEGY.exact)
+
+    def _estimate(self, query: Query) -> RowsCount:
+        connection = query.session.connection()
+        if connection.dialect.name != 'postgresql':
+            return RowsCount(query.count(), COUNT_STRATEGY.exact)
+
+        compiled = self._compile(query)
+        plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params).scalar()
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+
+        if estimate < self.estimate_threshold:
+            return RowsCount(query.count(), COUNT_STRATEGY.exact)
+
+        return RowsCount(estimate, COUNT_STRATEGY.estimated)
+
+    def _count_cached(self, query: Query) -> RowsCount:
+        compiled = self._compile(query)
+        fingerprint = hashlib.sha1(f'{compiled}|{sorted(compiled.params.items())!r}'.encode()).hexdigest()
+        key = f'{self.key_prefix}{fingerprint}'
+
+        try:
+            cached = self.cache.get(key)
+        except RedisError as e:
+            logger.warning(f'Failed to get cached rows count: {e}')
+            return RowsCount(query.count(), COUNT_STRATEGY.exact)
+
+        if cached is not None:
+            return RowsCount(int(cached), COUNT_STRATEGY.cached)
+
+        value = query.count()
+        try:
+            self.cache.add(key, str(value), self.cache_ttl)
+        except RedisError as e:
+            logger.warning(f'Failed to cache rows count: {e}')
+
+        return RowsCount(value, COUNT_STRATEGY.exact)
+
+    @staticmethod
+    def _compile(query: Query):
+        statement = query.order_by(None).statement
+        return statement.compile(dialect=query.session.get_bind().dialect, compile_kwargs={'render_postcompile': True})
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+from schemas.auth import Token
+
+Value = TypeVar('Value')
+
+
+class VerifiedTokenCache(Generic[Value]):
+    """
+    LRU-кэш уже проверенных JWT токенов в памяти процесса.
+
+    Ключом служит хэш токена, а время жизни записи ограничено как ``ttl``, так и сроком действия самого токена,
+    поэтому из кэша никогда не выдаётся информация по истёкшему токену.
+    Записи дополнительно индексируются по идентификатору токена (``jti``) для удаления при блокировке
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: int = 60):
+        """
+        :param maxsize: максимальное количество записей (0 - кэш отключен)
+        :param ttl: максимальное время жизни записи (сек.)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._items: OrderedDict[bytes, tuple[float, Value, str]] = OrderedDict()
+        self._ids: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: Token) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: Token) -> Value | None:
+        """
+        Получение закэшированного результата проверки токена
+        """
+        key = self._key(token)
+
+        with self._lock:
+            item = self._items.get(key)
+
+            if item is None or item[0] <= time.time():
+                if item is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(key)
+            self.hits += 1
+
+            return item[1]
+
+    def add(self, token: Token, value: Value, expired_at: float, token_id: str | None = None):
+        """
+        Сохранение результата проверки токена
+
+        :param token: проверенный токен
+        :param value: результат проверки
+        :param expired_at: время истечения токена (unix timestamp)
+        :param token_id: идентификатор токена (для токенов без ``jti`` - сам токен)
+        """
+        if self.maxsize <= 0:
+            return
+
+        key = self._key(token)
+        token_id = token_id or token
+        expired_at = min(expired_at, time.time() + self.ttl)
+
+        with self._lock:
+            self._items[key] = (expired_at, value, token_id)
+            self._items.move_to_end(key)
+            self._ids[token_id] = key
+
+            while len(self._items) > self.maxsize:
+                self._remove(next(iter(self._items)))
+
+    def discard(self, token_id: str):
+        """
+        Удаление токена из кэша по его идентификатору (например, при блокировке)
+        """
+        with self._lock:
+            key = self._ids.get(token_id)
+            if key is not None:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._ids.clear()
+
+    def _remove(self, key: bytes):
+        _, _, token_id = self._items.pop(key)
+        self._ids.pop(token_id, None)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Статистика использования кэша
+        """
+        return {'size': len(self._items), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,121 @@
+from flask import g, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from flask_jwt_extended.view_decorators import LocationType
+
+from core.exceptions.default_messages import ExceptionMessages
+from core.exceptions.exceptions import NotAuthorized
+from internal.cache import blocked_jwt_storage
+from schemas.auth import Token
+from services.blocked_jwt import TokenRevocationInfo
+from services.jwt_claims import AccessTokenClaims, UserClaims
+from services.jwt_generator import JWTGenerator
+from utils.auth import get_token_from_headers
+
+
+class AuthContext:
+    """
+    Информация об авторизации автора запроса в рамках одного запроса.
+
+    Токен из заголовков декодируется не более одного раза за запрос (в том числе, если он уже был проверен
+    через ``jwt_required``), а остальные данные вычисляются лениво при первом обращении и переиспользуются
+    всеми декораторами и роутами
+    """
+
+    def __init__(self):
+        self._claims: dict | None = None
+        self._token_info: AccessTokenClaims | None = None
+        self._is_blocked: bool | None = None
+
+    def verify(
+            self,
+            optional: bool = False,
+            fresh: bool = False,
+            refresh: bool = False,
+            locations: LocationType = None,
+            verify_type: bool = True,
+    ) -> dict:
+        """
+        Проверка токена из запроса (параметры аналогичны ``verify_jwt_in_request``)
+
+        :return: данные, содержащиеся в токене
+        """
+        if self._claims is None:
+            try:
+                self._claims = get_jwt()
+            except RuntimeError:
+                verify_jwt_in_request(optional, fresh, refresh, locations, verify_type)
+                self._claims = get_jwt()
+
+        return self._claims
+
+    @property
+    def token(self) -> Token:
+        """
+        Токен из заголовков запроса
+        """
+        return get_token_from_headers(request.headers)
+
+    @property
+    def token_id(self) -> str:
+        """
+        Идентификатор токена, по которому он блокируется
+        """
+        return self.claims.get('jti') or self.token
+
+    @property
+    def expired_at(self) -> float:
+        """
+        Время истечения токена (unix timestamp)
+        """
+        return self.claims['exp']
+
+    @property
+    def claims(self) -> dict:
+        return self.verify()
+
+    @property
+    def token_info(self) -> AccessTokenClaims:
+        """
+        :raises NotAuthorized: если в токене отсутствует информация о пользователе
+        """
+        if self._token_info is None:
+            try:
+                self._token_info = JWTGenerator.claims_codec.decode_access(self.claims)
+            except ValueError:
+                raise NotAuthorized(ExceptionMessages.incorrect_token())
+
+        return self._token_info
+
+    @property
+    def user(self) -> UserClaims:
+        return self.token_info.user
+
+    @property
+    def user_id(self) -> str:
+        return self.claims['sub']
+
+    @property
+    def is_blocked(self) -> bool:
+        """
+        Заблокирован ли токен, в том числе отзывом всех токенов пользователя
+        (результат проверки кэшируется в рамках запроса)
+        """
+        if self._is_blocked is None:
+            revocation_info = TokenRevocationInfo(
+                token_id=self.token_id,
+                user_id=str(self.user_id),
+                issued_at=self.claims.get('iat')
+            )
+            self._is_blocked = blocked_jwt_storage.is_revoked(revocation_info)
+
+        return self._is_blocked
+
+
+def get_auth_context() -> AuthContext:
+    """
+    Получение контекста авторизации текущего запроса
+    """
+    if 'auth_context' not in g:
+        g.auth_context = AuthContext()
+
+    return g.auth_context
@@ -7,6 +7,8 @@ from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from core.config import envs
+from services.db_pool import InstrumentedQueuePool
+from services.db_replicas import ReplicaRouter
 
 session_context: ContextVar[Session] = ContextVar('session_context')
 
@@ -41,4 +43,47 @@ def session_factory(
     return get_session, contextlib.contextmanager(get_session), engine
 
 
-db_session, db_session_manager, engine = session_factory(envs.db.connection_string)
+def read_session_factory(
+        router: ReplicaRouter
+) -> tuple[Generator[Session, None, None], Callable[[], ContextManager[Session]]]:
+    """
+    Функция для создания фабрики сессий только для чтения (запросы идут на реплики, если они настроены)
+
+    :param router: выбор сервера БД для чтения
+    :return: генератор для использования в fastapi.Depends, контекстный менеджер
+             бд для использования в любом ином месте
+    """
+
+    def get_read_session() -> Generator[Session, None, None]:
+        sess = Session(bind=router.get_engine())
+        try:
+            yield sess
+        finally:
+            # изменения через сессию для чтения не сохраняются
+            sess.rollback()
+            sess.close()
+
+    return get_read_session, contextlib.contextmanager(get_read_session)
+
+
+engine_params = {
+    'poolclass': InstrumentedQueuePool,
+    'pool_size': envs.db.pool_size,
+    'max_overflow': envs.db.max_overflow,
+    'pool_timeout': envs.db.pool_timeout,
+    'pool_pre_ping': envs.db.pool_pre_ping,
+    'pool_recycle': envs.db.pool_recycle,
+    'connect_args': (
+        {'options': f'-c statement_timeout={envs.db.statement_timeout}'} if envs.db.statement_timeout else {}
+    ),
+}
+
+db_session, db_session_manager, engine = session_factory(envs.db.connection_string, **engine_params)
+
+replica_router = ReplicaRouter(
+    engine,
+    [create_engine(dsn, **engine_params) for dsn in envs.db.replica_dsns],
+    max_lag=envs.db.replica_max_lag,
+    lag_check_interval=envs.db.replica_lag_check_interval
+)
+db_read_session, db_read_session_manager = read_session_factory(replica_router)
@@ -1,57 +1,206 @@
-import datetime
+import math
 from functools import wraps
 from http import HTTPStatus
-from typing import Any
+from typing import Any, Iterable
 
-from flask import jsonify, request
-from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from flask import Response, g, jsonify, request
 from redis.client import Redis
+from redis.exceptions import RedisError
 
-from core.config import envs
+from core.config import RateLimitRule, envs
+from core.constants import CLIENT_ID_HEADER
 from core.exceptions.default_messages import ExceptionMessages
+from internal.cache import redis, redis_breaker
 from internal.captcha import captcha_service
+from services.circuit_breaker import CircuitBreaker
+from services.rate_limit import RATE_LIMIT_POLICIES, LeasedPolicy, RateLimitPolicy, RateLimitResult, ScriptPolicy
 from utils.auth import get_ip_address_from_request
+from utils.auth_context import get_auth_context
 
 
-class Bucket:
-    """ Leaking bucket rate limiting decorator """
+class RateLimiter:
+    """
+    Ограничение количества запросов к роутам.
 
-    def __init__(self, with_captcha: bool = True):
-        self.pipeline = Redis(
-            host=envs.redis.host,
-            port=envs.redis.port,
-            password=envs.redis.password
-        ).pipeline()
+    Для каждого роута применяются правила из настроек (``RATE_ROUTES``), а при их отсутствии - правила,
+    переданные в декоратор, либо правило по умолчанию (``RATE_RATE_LIMIT_PER_MINUTE`` запросов пользователя
+    в минуту). Правила из настроек применяются и к роутам без декоратора (см. ``limit_configured_routes``),
+    поэтому ключи ``RATE_ROUTES`` должны быть существующими endpoint (см. ``check_routes``).
+    Каждое правило учитывается одним атомарным вызовом скрипта в Redis. Информация о самом строгом
+    из правил возвращается в заголовках ``X-RateLimit-*`` (см. ``add_rate_limit_headers``).
+    При недоступности Redis запросы пропускаются или отклоняются в зависимости от ``fail_open``
+    """
+
+    def __init__(
+            self,
+            client: Redis,
+            default_rule: RateLimitRule,
+            routes: dict[str, list[RateLimitRule]] | None = None,
+            key_prefix: str = 'rate_limit:',
+            with_captcha: bool = True,
+            lease_ttl: float = 1,
+            breaker: CircuitBreaker | None = None,
+            fail_open: bool = True,
+    ):
+        """
+        :param client: клиент Redis
+        :param default_rule: правило для роутов без собственных правил
+        :param routes: правила для роутов (по имени endpoint)
+        :param key_prefix: префикс ключей счётчиков
+        :param with_captcha: требовать решения каптчи при превышении лимита
+        :param lease_ttl: максимальное время жизни запросов, зарезервированных воркером для правил
+                          с ``local_share`` (сек.)
+        :param breaker: предохранитель, через который выполняются обращения к Redis
+        :param fail_open: пропускать запросы при недоступности Redis (иначе - отклонять без каптчи)
+        """
+        self.default_rule = default_rule
+        self.routes = routes or {}
+        self.key_prefix = key_prefix
         self.with_captcha = with_captcha
+        self.lease_ttl = lease_ttl
+        self.breaker = breaker
+        self.fail_open = fail_open
+
+        self.policies: dict[str, ScriptPolicy] = {}
+        self.leased_policies: dict[tuple[str, float], RateLimitPolicy] = {}
+        for name, policy_class in RATE_LIMIT_POLICIES.items():
+            policy = policy_class(client, breaker)
+            policy.load()
+            self.policies[name] = policy
+
+    def get_rules(self, endpoint: str, rules: tuple[RateLimitRule, ...] = ()) -> list[RateLimitRule]:
+        return self.routes.get(endpoint) or list(rules) or [self.default_rule]
+
+    def hit(self, endpoint: str, rule: RateLimitRule) -> RateLimitResult:
+        """
+        Учёт запроса текущего пользователя к роуту по правилу.
+
+        У каждого правила роута свой счётчик: в ключ входят алгоритм и период правила
+        """
+        key = f'{self.key_prefix}{endpoint}:{rule.key}:{rule.algorithm}:{rule.period}:{self._get_key(rule.key)}'
+
+        try:
+            return self.get_policy(rule).hit(key, rule.limit, rule.period, rule.burst)
+        except RedisError:
+            retry_after = self.breaker.recovery_time if self.breaker is not None else 1
+            if self.fail_open:
+                return RateLimitResult(True, rule.limit, rule.limit, retry_after)
+
+            return RateLimitResult(False, rule.limit, 0, retry_after, retry_after)
+
+    def get_policy(self, rule: RateLimitRule) -> RateLimitPolicy:
+        """
+        Алгоритм для правила: для правил с ``local_share`` - с локальным резервированием запросов
+        """
+        if rule.local_share is None:
+            return self.policies[rule.algorithm]
+
+        key = (rule.algorithm, rule.local_share)
+        if key not in self.leased_policies:
+            self.leased_policies[key] = LeasedPolicy(self.policies[rule.algorithm], rule.local_share, self.lease_ttl)
+
+        return self.leased_policies[key]
+
+    def check(self, rules: list[RateLimitRule]) -> Response | None:
+        """
+        Учёт текущего запроса по правилам
+
+        :return: ответ с ошибкой, если лимит превышен
+        """
+        results = [self.hit(request.endpoint, rule) for rule in rules]
+        g.rate_limit = min(results, key=lambda result: (result.allowed, result.remaining))
+
+        if g.rate_limit.allowed:
+            return None
+
+        if self.with_captcha:
+            try:
+                captcha_service.generate_problem(key=get_ip_address_from_request(request))
+            except RedisError:
+                # каптча хранится в Redis: при его недоступности запрос отклоняется без неё
+                pass
 
-    def rate_limit(self, func) -> Any:
+        response = jsonify(
+            message={HTTPStatus.TOO_MANY_REQUESTS: ExceptionMessages.too_many_requests()}
+        )
+        response.status_code = HTTPStatus.TOO_MANY_REQUESTS
+        return response
+
+    def rate_limit(self, func=None, *, rules: tuple[RateLimitRule, ...] = ()) -> Any:
+        """
+        Декоратор ограничения количества запросов (``@limiter.rate_limit`` или
+        ``@limiter.rate_limit(rules=(RateLimitRule(...),))``)
+        """
+        if func is None:
+            return lambda f: self.rate_limit(f, rules=rules)
 
         @wraps(func)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
-            uuid = get_jwt()['sub']
-            ip_addr = get_ip_address_from_request(request)
-
-            key = f'{uuid}:{datetime.datetime.now().minute}'
-            self.pipeline.incr(key, 1)
-            self.pipeline.expire(key, 59)
-
-            request_num = self.pipeline.execute()[0]
-            rate_limit = envs.limiter.rate_limit_per_minute
-
-            if request_num > rate_limit:
-                if self.with_captcha:
-                    request_num -= 1
-                    captcha_service.generate_problem(key=ip_addr)
-
-                response = jsonify(
-                    message={HTTPStatus.TOO_MANY_REQUESTS: ExceptionMessages.too_many_requests()}
-                )
-                response.status_code = HTTPStatus.TOO_MANY_REQUESTS
-                return response
+            # запрос к роуту из настроек уже учтён в limit_configured_routes
+            if 'rate_limit' not in g:
+                response = self.check(self.get_rules(request.endpoint, rules))
+                if response is not None:
+                    return response
+
             return func(*args, **kwargs)
 
         return decorator
 
+    def limit_configured_routes(self) -> Response | None:
+        """
+        Обработчик ``before_request``: ограничение запросов к роутам из настроек, в том числе без декоратора
+        """
+        rules = self.routes.get(request.endpoint)
+        if not rules:
+            return None
+
+        return self.check(rules)
+
+    def check_routes(self, endpoints: Iterable[str]):
+        """
+        Проверка, что правила из настроек заданы для существующих роутов
+
+        :param endpoints: endpoint всех роутов приложения
+        :raises ValueError: если в настройках есть правила для несуществующих роутов
+        """
+        unknown = sorted(set(self.routes) - set(endpoints))
+        if unknown:
+            raise ValueError(f'Rate limit rules are set for unknown endpoints: {", ".join(unknown)}')
+
+    @staticmethod
+    def _get_key(key_type: str) -> str:
+        if key_type == 'user':
+            return get_auth_context().user_id
+
+        ip_addr = get_ip_address_from_request(request)
+        if key_type == 'client':
+            return request.headers.get(CLIENT_ID_HEADER) or ip_addr
+
+        return ip_addr
+
+
+def add_rate_limit_headers(response: Response) -> Response:
+    """
+    Добавление в ответ информации об ограничении количества запросов (для роутов с ограничением)
+    """
+    result: RateLimitResult | None = g.get('rate_limit')
+    if result is None:
+        return response
+
+    response.headers['X-RateLimit-Limit'] = str(result.limit)
+    response.headers['X-RateLimit-Remaining'] = str(result.remaining)
+    response.headers['X-RateLimit-Reset'] = str(math.ceil(result.reset_after))
+    if not result.allowed:
+        response.headers['Retry-After'] = str(math.ceil(result.retry_after))
+
+    return response
+
 
-bucket = Bucket()
+limiter = RateLimiter(
+    redis,
+    default_rule=RateLimitRule(algorithm=envs.limiter.algorithm, limit=envs.limiter.rate_limit_per_minute),
+    routes=envs.limiter.routes,
+    lease_ttl=envs.limiter.lease_ttl,
+    breaker=redis_breaker,
+    fail_open=envs.limiter.fail_open
+)
@@ -1,16 +1,13 @@
 from functools import wraps
 from typing import Any
 
-from flask import current_app, request
-from flask_jwt_extended import verify_jwt_in_request
+from flask import current_app
 from flask_jwt_extended.view_decorators import LocationType
 
 from core.constants import ROLES
 from core.exceptions.default_messages import ExceptionMessages
 from core.exceptions.exceptions import NoPermissionException
-from internal.cache import blocked_jwt_storage
-from schemas.auth import TokenInfo
-from utils.auth import get_token_from_headers
+from utils.auth_context import get_auth_context
 
 
 def role_required(
@@ -24,8 +21,9 @@ def role_required(
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            header, data = verify_jwt_in_request(optional, fresh, refresh, locations, verify_type)
-            payload = TokenInfo(**data)
+            context = get_auth_context()
+            context.verify(optional, fresh, refresh, locations, verify_type)
+            payload = context.token_info
 
             role_id = str(payload.user.role_id)
             role_name = payload.user.role_name
@@ -33,10 +31,7 @@ def role_required(
             has_access = role_id in roles or role_name in roles
             has_root_access = role_id == ROLES.root.value or role_name == ROLES.root.name
 
-            access_token = get_token_from_headers(request.headers)
-            is_blocked = blocked_jwt_storage.have(access_token)
-
-            if is_blocked:
+            if context.is_blocked:
                 raise NoPermissionException(ExceptionMessages.expired_token())
 
             if not has_access and not has_root_access:
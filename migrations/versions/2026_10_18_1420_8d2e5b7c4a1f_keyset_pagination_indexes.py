@@ -0,0 +1,42 @@
+"""keyset_pagination_indexes
+
+Revision ID: 8d2e5b7c4a1f
+Revises: 3c8f2a7d91e4
+Create Date: 2026-10-18 14:20:11.502731
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8d2e5b7c4a1f'
+down_revision = '3c8f2a7d91e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # индекс секционированной таблицы создаётся на всех секциях; CONCURRENTLY для неё не поддерживается
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False, schema='users')
+
+    # история посещений - самая большая таблица, индекс строится без блокировки записи
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_user_login_histories_user_id_created_at_id',
+            'user_login_histories',
+            ['user_id', 'created_at', 'id'],
+            unique=False,
+            schema='users',
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_user_login_histories_user_id_created_at_id',
+            table_name='user_login_histories',
+            schema='users',
+            postgresql_concurrently=True
+        )
+
+    op.drop_index('ix_users_created_at_id', table_name='users', schema='users')
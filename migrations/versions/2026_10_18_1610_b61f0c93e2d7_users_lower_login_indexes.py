@@ -0,0 +1,26 @@
+"""users_lower_login_indexes
+
+Revision ID: b61f0c93e2d7
+Revises: 8d2e5b7c4a1f
+Create Date: 2026-10-18 16:10:37.904115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b61f0c93e2d7'
+down_revision = '8d2e5b7c4a1f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # поиск пользователя при входе по lower(login) / lower(email)
+    op.create_index('ix_users_lower_login', 'users', [sa.text('lower(login)')], unique=False, schema='users')
+    op.create_index('ix_users_lower_email', 'users', [sa.text('lower(email)')], unique=False, schema='users')
+
+
+def downgrade():
+    op.drop_index('ix_users_lower_email', table_name='users', schema='users')
+    op.drop_index('ix_users_lower_login', table_name='users', schema='users')
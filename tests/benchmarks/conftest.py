@@ -0,0 +1,76 @@
+import os
+import pathlib
+import sys
+
+import fakeredis
+import pytest
+
+# Бенчмарки запускаются без внешних сервисов: конфигурация задаётся до импорта приложения
+os.environ.setdefault('APP_ADDRESS', 'http://127.0.0.1:8000')
+os.environ.setdefault('APP_DEBUG', 'true')
+os.environ.setdefault('DB_NAME', 'benchmark')
+os.environ.setdefault('DB_USER', 'benchmark')
+os.environ.setdefault('DB_PASSWORD', 'benchmark')
+os.environ.setdefault('TRACER_ENABLE', 'false')
+os.environ.setdefault('TRACER_HOST', '127.0.0.1')
+os.environ.setdefault('TRACER_PORT', '6831')
+os.environ.setdefault('BLOCKLIST_FILTER_ENABLE', 'false')
+os.environ.setdefault('LOG_LOG_LEVEL', 'WARNING')
+
+sys.path.insert(0, str(pathlib.Path(__file__).parents[2] / 'app'))
+
+from flask import Flask  # noqa: E402
+from flask_jwt_extended import JWTManager  # noqa: E402
+
+from core.constants import ROLES  # noqa: E402
+from internal.cache import blocked_jwt_storage  # noqa: E402
+from schemas.auth import UserInfo  # noqa: E402
+from services.cache import RedisCache  # noqa: E402
+from services.jwt_generator import JWTGenerator  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app() -> Flask:
+    app = Flask(__name__)
+    app.config['JWT_ALGORITHM'] = JWTGenerator.key_storage.signing_key.algorithm
+    app.config['JWT_DECODE_ALGORITHMS'] = JWTGenerator.key_storage.algorithms
+    app.config['JWT_TOKEN_LOCATION'] = 'headers'
+    jwt = JWTManager(app)
+
+    @jwt.decode_key_loader
+    def decode_key_loader(jwt_header: dict, jwt_data: dict):
+        return JWTGenerator.key_storage.get(jwt_header.get('kid')).public_key
+
+    return app
+
+
+@pytest.fixture
+def request_context(app: Flask):
+    with app.test_request_context():
+        yield
+
+
+@pytest.fixture(autouse=True)
+def redis_stub(monkeypatch):
+    """
+    Хранилище заблокированных токенов в памяти процесса вместо Redis, эпохи отзыва токенов
+    пользователей не запрашиваются из БД
+    """
+    monkeypatch.setattr(blocked_jwt_storage, 'cache', RedisCache(fakeredis.FakeRedis()))
+    monkeypatch.setattr(blocked_jwt_storage, 'epoch_loader', lambda user_id: None)
+
+
+@pytest.fixture
+def user() -> UserInfo:
+    return UserInfo(
+        id='5b0d6c6d-1bb2-4cf6-9b8f-3b1f7a3f8a10',
+        login='benchmark',
+        role_id=ROLES.user.value,
+        role_name=ROLES.user.name
+    )
+
+
+@pytest.fixture
+def token(user: UserInfo, request_context) -> str:
+    token, _ = JWTGenerator.create_jwt(user)
+    return token
@@ -0,0 +1,77 @@
+import pytest
+from flask import Flask
+
+from core.constants import ROLES
+from schemas.auth import TokenInfo, UserInfo, UserInfoJWT
+from services.jwt_generator import JWTGenerator
+from utils.required import role_required
+
+
+@pytest.fixture
+def no_token_cache(monkeypatch):
+    monkeypatch.setattr(JWTGenerator.token_cache, 'maxsize', 0)
+    JWTGenerator.token_cache.clear()
+
+
+def test_create_jwt(benchmark, request_context, user: UserInfo):
+    token, refresh_token = benchmark(JWTGenerator.create_jwt, user)
+
+    assert token and refresh_token
+
+
+def test_parse_jwt(benchmark, token: str):
+    token_info = benchmark(JWTGenerator.parse_jwt, token)
+
+    assert token_info is not None
+
+
+def test_validate_jwt(benchmark, no_token_cache, request_context, token: str, user: UserInfo):
+    result = benchmark(JWTGenerator.validate_jwt, token)
+
+    assert result.id == user.id
+
+
+def test_validate_jwt_cached(benchmark, request_context, token: str, user: UserInfo):
+    JWTGenerator.validate_jwt(token)
+
+    result = benchmark(JWTGenerator.validate_jwt, token)
+
+    assert result.id == user.id
+
+
+def test_token_info_round_trip(benchmark, token: str):
+    claims = JWTGenerator.parse_jwt(token).dict(by_alias=True)
+
+    result = benchmark(lambda: TokenInfo(**claims).dict(by_alias=True))
+
+    assert result['jti'] == claims['jti']
+
+
+def test_user_info_jwt_round_trip(benchmark, user: UserInfo):
+    result = benchmark(lambda: UserInfoJWT(**user.dict()).dict())
+
+    assert result['id'] == user.id
+
+
+def test_role_required(benchmark, app: Flask, token: str):
+    @role_required([ROLES.user.value])
+    def view():
+        return 'ok'
+
+    def call():
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            return view()
+
+    assert benchmark(call) == 'ok'
+
+
+def test_claims_codec_round_trip(benchmark, token: str):
+    claims = JWTGenerator.parse_jwt(token).dict(by_alias=True)
+    codec = JWTGenerator.claims_codec
+
+    def round_trip():
+        return codec.encode_access(codec.decode_access(claims).user, claims['exp'], claims['iat'], claims['jti'])
+
+    result = benchmark(round_trip)
+
+    assert result['jti'] == claims['jti']
@@ -5,6 +5,7 @@ import pytest
 import pytest_asyncio
 
 from endpoints.core.settings import test_settings
+from endpoints.utils.redis import reset_rate_limits
 
 # Переопределение event_loop - не нужно использовать как фикстуру напрямую
 from redis.client import Redis
@@ -36,3 +37,21 @@ def redis_client():
     yield redis
 
     redis.close()
+
+
+@pytest.fixture
+def rate_limits_reset():
+    """
+    Тест начинается без накопленных счётчиков ограничения запросов и блокировки каптчей по IP адресу
+    (превышение лимита в одном тесте перенаправляло бы все последующие запросы на каптчу)
+    """
+    redis = Redis(
+        host=test_settings.redis.host,
+        port=test_settings.redis.port,
+        password=test_settings.redis.password
+    )
+    reset_rate_limits(redis)
+
+    yield
+
+    redis.close()
@@ -10,3 +10,4 @@ class ApiRoutes(str, enum.Enum):
     auth = 'v1/auth'
     roles = 'v1/roles'
     users = 'v1/users'
+    well_known = '.well-known'
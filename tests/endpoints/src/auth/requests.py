@@ -125,6 +125,36 @@ async def validate_token(
     return response, data
 
 
+async def validate_tokens(
+        client: ClientSession,
+        token: str,
+        tokens: list[str]
+):
+    response, data = await api_request(
+        client,
+        RequestMethods.post,
+        ApiRoutes.auth,
+        route_detail='/validate-tokens',
+        with_check=False,
+        data={'tokens': tokens},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+
+    return response, data
+
+
+async def get_jwks(client: ClientSession):
+    response, data = await api_request(
+        client,
+        RequestMethods.get,
+        ApiRoutes.well_known,
+        route_detail='/jwks.json',
+        with_check=False,
+    )
+
+    return response, data
+
+
 async def repeat_requests(times: int, func, *args, **kwargs) -> Any:
     """Make times calls of func."""
     result = None
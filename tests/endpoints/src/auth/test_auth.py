@@ -1,3 +1,4 @@
+import asyncio
 from http import HTTPStatus
 from typing import Any
 
@@ -5,7 +6,21 @@ import pytest
 from pydantic import BaseModel
 
 from endpoints.src.auth.requests import register_user, login, logout, generate_access_token, change_password, \
-    validate_token, repeat_requests
+    validate_token, repeat_requests, get_jwks, validate_tokens
+
+pytestmark = pytest.mark.usefixtures('rate_limits_reset')
+
+
+def tamper_signature(token: str) -> str:
+    """
+    Токен с изменённым символом в середине подписи (последний символ base64 может кодировать неиспользуемые биты,
+    поэтому его замена не всегда меняет подпись)
+    """
+    header_payload, _, signature = token.rpartition('.')
+    middle = len(signature) // 2
+    replacement = 'A' if signature[middle] != 'A' else 'B'
+
+    return f'{header_payload}.{signature[:middle]}{replacement}{signature[middle + 1:]}'
 
 
 class DataTestExpected(BaseModel):
@@ -162,13 +177,28 @@ async def test_validate_token_with_wrong_token_failed(request_client):
     password = '123qwe'
     _, register_data = await register_user(request_client, password=password, with_check=True)
     _, login_data = await login(request_client, user_login=register_data.get('login'), password=password)
-    token = login_data.get('token')[:-1] + 'b'
+    token = tamper_signature(login_data.get('token'))
 
     response, data = await validate_token(request_client, token=token)
 
     assert response.status == HTTPStatus.UNAUTHORIZED
 
 
+@pytest.mark.asyncio
+async def test_validate_tokens(request_client):
+    password = '123qwe'
+    _, register_data = await register_user(request_client, password=password, with_check=True)
+    _, login_data = await login(request_client, user_login=register_data.get('login'), password=password)
+    token = login_data.get('token')
+
+    response, data = await validate_tokens(request_client, token=token, tokens=[token, tamper_signature(token)])
+
+    assert response.status == HTTPStatus.OK
+    valid, invalid = data.get('data')
+    assert valid.get('is_valid') and valid.get('user').get('id') == login_data.get('user').get('id')
+    assert not invalid.get('is_valid')
+
+
 @pytest.mark.asyncio
 async def test_rate_limiter(request_client):
     password = '123qwe'
@@ -179,7 +209,34 @@ async def test_rate_limiter(request_client):
     response, data = await repeat_requests(5, validate_token, request_client, token=token)
 
     assert response.status == HTTPStatus.OK
+    assert response.headers.get('X-RateLimit-Limit') == '5'
+    assert response.headers.get('X-RateLimit-Remaining') == '0'
 
     response, data = await validate_token(request_client, token=token)
 
     assert response.status == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.headers.get('Retry-After')
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_concurrent_requests(request_client):
+    rate_limit = 5
+    password = '123qwe'
+    _, register_data = await register_user(request_client, password=password, with_check=True)
+    _, login_data = await login(request_client, user_login=register_data.get('login'), password=password)
+    token = login_data.get('token')
+
+    results = await asyncio.gather(*[validate_token(request_client, token=token) for _ in range(50)])
+
+    statuses = [response.status for response, _ in results]
+    assert statuses.count(HTTPStatus.OK) == rate_limit
+    assert statuses.count(HTTPStatus.TOO_MANY_REQUESTS) == len(statuses) - rate_limit
+
+
+@pytest.mark.asyncio
+async def test_jwks(request_client):
+    response, data = await get_jwks(request_client)
+
+    assert response.status == HTTPStatus.OK
+    # тестовое окружение подписывает токены HS256: общий секрет не публикуется
+    assert data == {'keys': []}
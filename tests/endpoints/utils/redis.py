@@ -3,3 +3,15 @@ from redis.client import Redis
 
 def clear_cache(redis_client: Redis):
     redis_client.flushall()
+
+
+def reset_rate_limits(redis_client: Redis):
+    """
+    Сброс счётчиков ограничения запросов и блокировок каптчей (в том числе в локальных кэшах воркеров сервиса)
+    """
+    for key in redis_client.scan_iter('rate_limit:*'):
+        redis_client.delete(key)
+
+    for key in redis_client.scan_iter('captcha:*'):
+        redis_client.delete(key)
+        redis_client.publish('captcha:events', b'u:' + key)
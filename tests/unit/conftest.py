@@ -0,0 +1,59 @@
+import os
+import pathlib
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+from redis.client import Redis
+from redis.exceptions import ConnectionError
+
+# Модульные тесты запускаются без внешних сервисов: конфигурация задаётся до импорта приложения
+os.environ.setdefault('APP_ADDRESS', 'http://127.0.0.1:8000')
+os.environ.setdefault('DB_NAME', 'unit')
+os.environ.setdefault('DB_USER', 'unit')
+os.environ.setdefault('DB_PASSWORD', 'unit')
+os.environ.setdefault('TRACER_ENABLE', 'false')
+os.environ.setdefault('TRACER_HOST', '127.0.0.1')
+os.environ.setdefault('TRACER_PORT', '6831')
+
+sys.path.insert(0, str(pathlib.Path(__file__).parents[2] / 'app'))
+
+
+@pytest.fixture(scope='module')
+def redis_client(tmp_path_factory) -> Redis:
+    """
+    Отдельный процесс ``redis-server`` (для тестов Lua скриптов, которые не поддерживает fakeredis)
+    """
+    server = shutil.which('redis-server')
+    if server is None:
+        pytest.skip('redis-server is not installed')
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    directory = tmp_path_factory.mktemp('redis')
+    process = subprocess.Popen(
+        [server, '--port', str(port), '--save', '', '--appendonly', 'no', '--dir', str(directory)],
+        stdout=subprocess.DEVNULL,
+    )
+    client = Redis(port=port)
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                client.ping()
+                break
+            except ConnectionError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+        yield client
+    finally:
+        client.close()
+        process.terminate()
+        process.wait()
@@ -0,0 +1,24 @@
+import fakeredis
+
+from services.blocked_addresses import BlockedAddressCache
+from services.cache import RedisCache
+
+
+def test_unblock_during_redis_read_is_not_overwritten(monkeypatch):
+    cache = RedisCache(fakeredis.FakeRedis(decode_responses=True))
+    cache.add('captcha:127.0.0.1', '42', 60)
+    blocked = BlockedAddressCache(cache)
+    read_ttl = cache.ttl
+
+    def ttl_then_unblock(key: str):
+        # блокировка прочитана из Redis, но до записи в кэш от другого воркера приходит событие разблокировки
+        ttl = read_ttl(key)
+        cache.pop(key)
+        blocked._handle_event(f'u:{key}')
+        return ttl
+
+    monkeypatch.setattr(cache, 'ttl', ttl_then_unblock)
+
+    assert blocked.is_blocked('captcha:127.0.0.1') is False
+    monkeypatch.setattr(cache, 'ttl', read_ttl)
+    assert blocked.is_blocked('captcha:127.0.0.1') is False
@@ -0,0 +1,57 @@
+import fakeredis
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from services.blocked_jwt import BlockedJWTStorage, TokenRevocationInfo
+from services.cache import RedisCache
+
+USER_ID = '1f0e5a4c-54b4-4b1e-9a43-7c1f3f0b6a11'
+
+
+@pytest.fixture
+def cache() -> RedisCache:
+    return RedisCache(fakeredis.FakeRedis(decode_responses=True))
+
+
+def unavailable_database(user_id: str) -> float | None:
+    raise OperationalError('SELECT users.tokens_revoked_at', {}, ConnectionRefusedError())
+
+
+@pytest.mark.parametrize('fail_open', [False, True])
+def test_epoch_loader_failure(cache: RedisCache, fail_open: bool):
+    storage = BlockedJWTStorage(cache, epoch_loader=unavailable_database, fail_open=fail_open)
+
+    assert storage.is_revoked(TokenRevocationInfo('jti', USER_ID, 100)) is not fail_open
+    # отсутствие эпохи не запоминается, пока БД недоступна
+    assert cache.get(f'revoked_before:{USER_ID}') is None
+
+
+def test_blocked_token_does_not_load_epoch(cache: RedisCache):
+    storage = BlockedJWTStorage(cache, epoch_loader=unavailable_database, fail_open=True)
+    storage.add('jti', user_id=USER_ID)
+
+    assert storage.is_revoked_many([TokenRevocationInfo('jti', USER_ID, 100)]) == [True]
+
+
+def test_loaded_epoch_does_not_overwrite_revocation(cache: RedisCache):
+    # проверка прочитала из БД отсутствие эпохи до фиксации отзыва, а сохраняет его в кэш уже после
+    storage = BlockedJWTStorage(cache, epoch_loader=lambda user_id: storage.revoke_user(user_id, 200.5))
+
+    assert storage.is_revoked(TokenRevocationInfo('jti', USER_ID, 100)) is False
+    assert storage.is_revoked(TokenRevocationInfo('other-jti', USER_ID, 100)) is True
+
+
+def test_epoch_is_rounded_up_to_second(cache: RedisCache):
+    storage = BlockedJWTStorage(cache)
+    storage.revoke_user(USER_ID, 200.5)
+
+    # iat целое: токен с iat=200 мог быть выпущен до отзыва в ту же секунду
+    assert storage.is_revoked(TokenRevocationInfo('same-second', USER_ID, 200)) is True
+    assert storage.is_revoked(TokenRevocationInfo('next-second', USER_ID, 201)) is False
+
+
+def test_loaded_epoch_is_rounded_up_to_second(cache: RedisCache):
+    storage = BlockedJWTStorage(cache, epoch_loader=lambda user_id: 200.5)
+
+    assert storage.is_revoked(TokenRevocationInfo('same-second', USER_ID, 200)) is True
+    assert storage.is_revoked(TokenRevocationInfo('next-second', USER_ID, 201)) is False
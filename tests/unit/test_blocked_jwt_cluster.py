@@ -0,0 +1,150 @@
+import random
+import shutil
+import socket
+import subprocess
+import time
+import uuid
+
+import pytest
+from redis.client import Redis
+from redis.cluster import RedisCluster
+from redis.connection import Connection
+from redis.crc import key_slot
+from redis.exceptions import RedisError
+
+from services.blocked_jwt import BlockedJWTStorage, TokenRevocationInfo
+from services.cache import RedisCache
+from services.revocation_filter import RevocationFilter
+
+CLUSTER_SIZE = 3
+
+
+def _free_port() -> int:
+    """
+    Свободный порт узла, у которого свободен и порт шины кластера (порт узла + 10000)
+    """
+    while True:
+        port = random.randint(20000, 50000)
+        try:
+            for candidate in (port, port + 10000):
+                with socket.socket() as sock:
+                    sock.bind(('127.0.0.1', candidate))
+        except OSError:
+            continue
+
+        return port
+
+
+def _wait(condition, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if condition():
+                return
+        except (RedisError, OSError):
+            pass
+        time.sleep(0.1)
+
+    raise TimeoutError('Redis cluster is not ready')
+
+
+@pytest.fixture(scope='module')
+def redis_cluster(tmp_path_factory) -> RedisCluster:
+    """
+    Локальный Redis Cluster из нескольких процессов ``redis-server`` (без реплик)
+    """
+    server = shutil.which('redis-server')
+    if server is None:
+        pytest.skip('redis-server is not installed')
+
+    directory = tmp_path_factory.mktemp('redis-cluster')
+    ports = [_free_port() for _ in range(CLUSTER_SIZE)]
+    processes = [
+        subprocess.Popen(
+            [server, '--port', str(port), '--cluster-enabled', 'yes', '--cluster-config-file', f'nodes-{port}.conf',
+             '--save', '', '--appendonly', 'no'],
+            cwd=directory,
+            stdout=subprocess.DEVNULL
+        )
+        for port in ports
+    ]
+
+    try:
+        nodes = [Redis(port=port) for port in ports]
+        for node in nodes:
+            _wait(node.ping)
+
+        slots_per_node = 16384 // CLUSTER_SIZE + 1
+        for i, node in enumerate(nodes):
+            node.execute_command('CLUSTER SET-CONFIG-EPOCH', i + 1)
+            node.execute_command('CLUSTER ADDSLOTS', *range(i * slots_per_node, min(16384, (i + 1) * slots_per_node)))
+            if i:
+                node.execute_command('CLUSTER MEET', '127.0.0.1', ports[0])
+
+        for node in nodes:
+            _wait(lambda: node.execute_command('CLUSTER INFO')['cluster_state'] == 'ok')
+
+        cluster = RedisCluster(host='127.0.0.1', port=ports[0])
+        yield cluster
+        cluster.close()
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+@pytest.fixture
+def round_trips(monkeypatch) -> list[int]:
+    """
+    Порты узлов, на которые отправлялись команды (по одной записи на запрос к узлу)
+    """
+    requests = []
+    send_packed_command = Connection.send_packed_command
+
+    def counting_send_packed_command(self, command, check_health=True):
+        requests.append(self.port)
+        return send_packed_command(self, command, check_health)
+
+    monkeypatch.setattr(Connection, 'send_packed_command', counting_send_packed_command)
+    return requests
+
+
+def test_token_keys_share_slot():
+    storage = BlockedJWTStorage(RedisCache(Redis()), hash_tags=True)
+    user_id = str(uuid.uuid4())
+
+    keys = storage._keys(str(uuid.uuid4()), user_id) + [storage._epoch_key(user_id)]
+
+    assert len({key_slot(key.encode()) for key in keys}) == 1
+
+
+def test_lookup_is_single_round_trip(redis_cluster: RedisCluster, round_trips: list[int]):
+    storage = BlockedJWTStorage(RedisCache(redis_cluster), hash_tags=True)
+    users = [str(uuid.uuid4()) for _ in range(20)]
+    storage.add_many([(f'token-{i}', time.time() + 60, user_id) for i, user_id in enumerate(users)])
+    storage.revoke_user(users[1], time.time())
+
+    issued_at = time.time() - 10
+    for i, user_id in enumerate(users):
+        round_trips.clear()
+
+        # токен и эпоха отзыва пользователя - одним запросом (токены с jti: ключа старого формата без префикса,
+        # который находится в другом слоте, у них нет)
+        assert storage.is_revoked(TokenRevocationInfo(f'token-{i}', user_id, issued_at))
+        assert storage.is_revoked(TokenRevocationInfo('other-token', user_id, issued_at)) == (i == 1)
+        assert len(round_trips) == 2
+
+
+def test_revocation_filter_snapshot(redis_cluster: RedisCluster):
+    cache = RedisCache(redis_cluster)
+    revocation_filter = RevocationFilter(cache, 'blocked_jwt:', 'revoked_before:')
+    storage = BlockedJWTStorage(cache, hash_tags=True, revocation_filter=revocation_filter)
+    user_id = str(uuid.uuid4())
+    storage.add('snapshot-token', time.time() + 60, user_id)
+    storage.revoke_user(user_id, time.time())
+
+    revocation_filter.snapshot()
+
+    assert revocation_filter.maybe_revoked('snapshot-token')
+    assert revocation_filter.maybe_revoked('unknown', user_id)
+    assert not revocation_filter.maybe_revoked('unknown', str(uuid.uuid4()))
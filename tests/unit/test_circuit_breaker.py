@@ -0,0 +1,123 @@
+import time
+
+import gevent
+import pytest
+from redis.exceptions import ConnectionError, TimeoutError
+
+from services import circuit_breaker
+from services.blocked_jwt import BlockedJWTStorage, TokenRevocationInfo
+from services.cache import RedisCache
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class SlowRedis:
+    """
+    Замена клиента Redis в памяти процесса с искусственной задержкой и отказами
+    """
+
+    def __init__(self, delay: float = 0, sleep=time.sleep):
+        self.delay = delay
+        self.is_down = False
+        self.calls = 0
+        self.data = {}
+
+        self._sleep = sleep
+
+    def _execute(self):
+        self.calls += 1
+        if self.delay:
+            self._sleep(self.delay)
+        if self.is_down:
+            raise ConnectionError('Redis is down')
+
+    def get(self, key):
+        self._execute()
+        return self.data.get(key)
+
+    def mget(self, keys):
+        self._execute()
+        return [self.data.get(key) for key in keys]
+
+    def set(self, name, value):
+        self._execute()
+        self.data[name] = value
+
+
+@pytest.fixture
+def breaker() -> CircuitBreaker:
+    return CircuitBreaker(deadline=0.05, failure_threshold=3, recovery_time=0.2)
+
+
+def test_slow_calls_open_breaker(breaker: CircuitBreaker):
+    client = SlowRedis(delay=0.08)
+    cache = RedisCache(client, breaker=breaker)
+
+    for _ in range(3):
+        cache.get('key')
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()['trips'] == 1
+    assert breaker.stats()['timeouts'] == 3
+
+    started_at = time.perf_counter()
+    with pytest.raises(CircuitOpenError):
+        cache.get('key')
+
+    # разомкнутый предохранитель не обращается к Redis и не ждёт его
+    assert time.perf_counter() - started_at < 0.01
+    assert client.calls == 3
+    assert breaker.stats()['rejected'] == 1
+    assert breaker.stats()['p99_ms'] >= 80
+
+
+def test_breaker_recovers_after_successful_probe(breaker: CircuitBreaker):
+    client = SlowRedis()
+    cache = RedisCache(client, breaker=breaker)
+    client.is_down = True
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            cache.get('key')
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # неудачная пробная попытка снова размыкает предохранитель
+    time.sleep(0.2)
+    with pytest.raises(ConnectionError):
+        cache.get('key')
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()['trips'] == 2
+
+    client.is_down = False
+    time.sleep(0.2)
+    cache.add('key', 'value')
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert cache.get('key') == 'value'
+
+
+def test_deadline_interrupts_call_under_gevent(breaker: CircuitBreaker, monkeypatch):
+    monkeypatch.setattr(circuit_breaker.monkey, 'is_module_patched', lambda name: True)
+    cache = RedisCache(SlowRedis(delay=1, sleep=gevent.sleep), breaker=breaker)
+
+    started_at = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        cache.get('key')
+
+    assert time.perf_counter() - started_at < 0.5
+    assert breaker.stats()['timeouts'] == 1
+
+
+@pytest.mark.parametrize('fail_open', [False, True])
+def test_blocklist_failure_policy(breaker: CircuitBreaker, fail_open: bool):
+    client = SlowRedis()
+    storage = BlockedJWTStorage(RedisCache(client, breaker=breaker), fail_open=fail_open)
+    client.is_down = True
+
+    tokens = [TokenRevocationInfo(token_id=str(i), user_id='user', issued_at=0) for i in range(5)]
+    for _ in range(4):
+        assert storage.is_revoked_many(tokens) == [not fail_open] * len(tokens)
+
+    # после размыкания предохранителя проверки не ждут Redis
+    assert breaker.state == CircuitBreaker.OPEN
+    assert client.calls == 3
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from services.db_pool import InstrumentedQueuePool
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "db.sqlite"}',
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.1
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_stats_track_checked_out_connections(engine):
+    with engine.connect() as first, engine.connect() as second:
+        first.execute(text('select 1'))
+        second.execute(text('select 1'))
+
+        stats = engine.pool.stats()
+        assert stats['in_use'] == 2
+        assert stats['overflow'] == 1
+
+    stats = engine.pool.stats()
+    assert stats['in_use'] == 0
+    assert stats['max_in_use'] == 2
+    assert stats['max_overflow_in_use'] == 1
+    assert stats['acquired'] == 2
+
+
+def test_exhausted_pool_counts_timeouts(engine):
+    with engine.connect(), engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    stats = engine.pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['acquired'] == 2
+
+
+def test_dispose_keeps_pool_class(engine):
+    with engine.connect():
+        pass
+
+    engine.dispose()
+
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    assert engine.pool.stats()['acquired'] == 0
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine
+
+from services.db_replicas import ReplicaRouter
+
+
+@pytest.fixture
+def engines(tmp_path):
+    engines = [create_engine(f'sqlite:///{tmp_path / f"{name}.sqlite"}') for name in ('primary', 'first', 'second')]
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+def test_reads_are_spread_over_replicas(engines, monkeypatch):
+    primary, *replicas = engines
+    router = ReplicaRouter(primary, replicas)
+    monkeypatch.setattr(router, '_check_lag', lambda replica: 0.0)
+
+    assert [router.get_engine() for _ in range(4)] == replicas * 2
+    assert router.stats()['fallbacks'] == 0
+
+
+def test_without_replicas_reads_go_to_primary(engines):
+    router = ReplicaRouter(engines[0], [])
+
+    assert router.get_engine() is engines[0]
+    assert router.stats()['fallbacks'] == 0
+
+
+def test_unavailable_replica_without_max_lag_falls_back_to_primary(engines, tmp_path):
+    primary = engines[0]
+    # реплика недоступна: файла БД нет и он не может быть создан
+    replica = create_engine(f'sqlite:///{tmp_path / "missing" / "replica.sqlite"}')
+    router = ReplicaRouter(primary, [replica], lag_check_interval=60)
+
+    assert router.get_engine() is primary
+    assert router.get_engine() is primary
+
+    stats = router.stats()
+    assert stats['available'] == 0
+    assert stats['fallbacks'] == 2
+    replica.dispose()
+
+
+def test_lagging_replicas_fall_back_to_primary(engines, monkeypatch):
+    primary, first, second = engines
+    lags = {first: 10.0, second: 0.5}
+    checks = []
+
+    def check_lag(replica):
+        checks.append(replica)
+        return lags[replica]
+
+    router = ReplicaRouter(primary, [first, second], max_lag=1, lag_check_interval=60)
+    monkeypatch.setattr(router, '_check_lag', check_lag)
+
+    assert {router.get_engine() for _ in range(4)} == {second}
+    # отставание проверяется не чаще lag_check_interval
+    assert checks == [first, second]
+
+    lags[second] = None
+    router._checked_at[second] = float('-inf')
+    assert router.get_engine() is primary
+
+    stats = router.stats()
+    assert stats['available'] == 0
+    assert stats['fallbacks'] == 1
+    assert stats['max_lag_s'] == 10
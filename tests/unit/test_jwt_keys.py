@@ -0,0 +1,34 @@
+import jwt
+import pytest
+
+from services.jwt_keys import JWTKeyStorage, generate_private_key
+
+PRIVATE_JWK_FIELDS = {'d', 'p', 'q', 'dp', 'dq', 'qi', 'k'}
+
+
+@pytest.mark.parametrize('algorithm, kty', [('RS256', 'RSA'), ('EdDSA', 'OKP')])
+def test_key_is_loaded_by_kid(tmp_path, algorithm: str, kty: str):
+    (tmp_path / 'old.pem').write_bytes(generate_private_key(algorithm))
+    (tmp_path / 'new.pem').write_bytes(generate_private_key(algorithm))
+    storage = JWTKeyStorage(algorithm=algorithm, keys_dir=str(tmp_path), active_kid='old')
+
+    key = storage.signing_key
+    token = jwt.encode({'sub': 'user'}, key=key.private_key, algorithm=key.algorithm, headers={'kid': key.kid})
+
+    kid = jwt.get_unverified_header(token)['kid']
+    assert kid == 'old'
+    assert jwt.decode(token, storage.get(kid).public_key, algorithms=storage.algorithms) == {'sub': 'user'}
+    with pytest.raises(jwt.InvalidSignatureError):
+        jwt.decode(token, storage.get('new').public_key, algorithms=storage.algorithms)
+
+    jwks = storage.jwks()['keys']
+    assert [(jwk['kid'], jwk['kty'], jwk['alg']) for jwk in jwks] == [('new', kty, algorithm), ('old', kty, algorithm)]
+    assert not any(PRIVATE_JWK_FIELDS & set(jwk) for jwk in jwks)
+    # опубликованного ключа достаточно для проверки токена сторонним сервисом
+    assert jwt.decode(token, jwt.PyJWK(jwks[1]).key, algorithms=[algorithm]) == {'sub': 'user'}
+
+
+def test_symmetric_secret_is_not_published():
+    storage = JWTKeyStorage(algorithm='HS256', secret='secret')
+
+    assert storage.jwks() == {'keys': []}
@@ -0,0 +1,83 @@
+import base64
+import datetime
+import uuid
+
+import pytest
+from sqlalchemy import Column, DateTime, String, create_engine, event
+from sqlalchemy.orm import Session, declarative_base
+
+from core.exceptions.exceptions import LogicException
+from internal.crud.utils import keyset_pagination
+
+Base = declarative_base()
+
+
+class Record(Base):
+    __tablename__ = 'records'
+
+    id = Column(String, primary_key=True)
+    created_at = Column(DateTime)
+
+
+def record_id(i: int) -> str:
+    return str(uuid.UUID(int=i))
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+
+    started_at = datetime.datetime(2022, 1, 1)
+    with Session(engine) as session:
+        # по две записи с одинаковым created_at: порядок внутри них задаёт id
+        session.add_all(
+            Record(id=record_id(i), created_at=started_at + datetime.timedelta(minutes=i // 2)) for i in range(25)
+        )
+        session.add(Record(id=record_id(100), created_at=None))
+        session.commit()
+        yield session
+
+
+def test_pages_cover_all_rows_once(session):
+    pages, cursor = [], None
+    while True:
+        records, cursor = keyset_pagination(session.query(Record), cursor, 10, Record)
+        pages.append([record.id for record in records])
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    # запись без created_at не выдаётся
+    assert sum(pages, []) == [record_id(i) for i in reversed(range(25))]
+
+
+def test_page_does_not_scan_previous_pages(session):
+    _, cursor = keyset_pagination(session.query(Record), '', 20, Record)
+    statements = []
+    event.listen(session.get_bind(), 'before_cursor_execute', lambda *args: statements.append(args[2:4]))
+
+    records, next_cursor = keyset_pagination(session.query(Record), cursor, 20, Record)
+
+    assert [record.id for record in records] == [record_id(i) for i in reversed(range(5))]
+    assert next_cursor is None
+    (statement, parameters), = statements
+    # одна выборка со смещением 0 (sqlite всегда добавляет OFFSET к LIMIT) и без подсчёта количества
+    assert parameters[-2:] == (21, 0)
+    assert 'count(' not in statement
+
+
+def encoded(data: str) -> str:
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor',
+    'WzFd',
+    'bnVsbA',
+    encoded('["2022-01-01T00:00:00","not-a-uuid"]'),
+    encoded('["2022-01-01T00:00:00",1]'),
+])
+def test_incorrect_cursor(session, cursor):
+    with pytest.raises(LogicException):
+        keyset_pagination(session.query(Record), cursor, 10, Record)
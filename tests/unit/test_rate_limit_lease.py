@@ -0,0 +1,60 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from redis.client import Redis
+
+from services.rate_limit import RATE_LIMIT_POLICIES, LeasedPolicy, ScriptPolicy
+
+
+@pytest.mark.parametrize('algorithm', list(RATE_LIMIT_POLICIES))
+def test_expired_lease_returns_unused_tokens(redis_client: Redis, algorithm: str):
+    redis_client.flushall()
+    policy = LeasedPolicy(RATE_LIMIT_POLICIES[algorithm](redis_client), share=0.5, lease_ttl=0.05)
+
+    # редкие запросы: каждый резерв истекает до следующего запроса
+    results = []
+    for _ in range(10):
+        results.append(policy.hit('key', 10, 60))
+        time.sleep(0.1)
+
+    assert all(result.allowed for result in results)
+    assert policy.hit('key', 10, 60).allowed is False
+
+
+class BarrierPolicy:
+    """
+    Алгоритм, первые обращения к которому из нескольких потоков выполняются одновременно
+    """
+
+    def __init__(self, policy: ScriptPolicy, parties: int):
+        self.policy = policy
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def __getattr__(self, name: str):
+        return getattr(self.policy, name)
+
+    def acquire(self, *args):
+        if not self.barrier.broken:
+            try:
+                self.barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+
+        return self.policy.acquire(*args)
+
+
+@pytest.mark.parametrize('algorithm', list(RATE_LIMIT_POLICIES))
+def test_concurrent_leases_are_not_lost(redis_client: Redis, algorithm: str):
+    redis_client.flushall()
+    policy = LeasedPolicy(BarrierPolicy(RATE_LIMIT_POLICIES[algorithm](redis_client), 2), share=0.5, lease_ttl=60)
+
+    # оба потока не находят резерв и резервируют запросы в Redis одновременно
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(lambda _: policy.hit('key', 10, 60), range(2)))
+    policy.policy.barrier.abort()
+    results += [policy.hit('key', 10, 60) for _ in range(8)]
+
+    assert all(result.allowed for result in results)
+    assert policy.hit('key', 10, 60).allowed is False
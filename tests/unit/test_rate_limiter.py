@@ -0,0 +1,42 @@
+from http import HTTPStatus
+
+import pytest
+from flask import Flask
+from redis.client import Redis
+
+from core.config import RateLimitRule
+from utils.rate_limit import RateLimiter
+
+
+def create_app(limiter: RateLimiter) -> Flask:
+    app = Flask(__name__)
+    app.before_request(limiter.limit_configured_routes)
+    app.add_url_rule('/plain', 'plain', lambda: 'ok')
+
+    return app
+
+
+@pytest.mark.parametrize('algorithms', [('fixed_window', 'fixed_window'), ('sliding_window', 'gcra')])
+def test_route_rules_are_counted_separately(redis_client: Redis, algorithms: tuple[str, str]):
+    redis_client.flushall()
+    short, long = algorithms
+    limiter = RateLimiter(
+        redis_client,
+        RateLimitRule(limit=100),
+        routes={
+            'plain': [
+                RateLimitRule(algorithm=short, limit=3, period=60, key='ip'),
+                RateLimitRule(algorithm=long, limit=100, period=3600, key='ip'),
+            ]
+        },
+        with_captcha=False,
+        fail_open=False,
+    )
+    client = create_app(limiter).test_client()
+
+    # запрос учитывается каждым правилом один раз, а не дважды в общем счётчике
+    statuses = [client.get('/plain').status_code for _ in range(4)]
+
+    assert statuses == [HTTPStatus.OK] * 3 + [HTTPStatus.TOO_MANY_REQUESTS]
+    # у часового правила свой счётчик с собственным временем жизни
+    assert max(redis_client.ttl(key) for key in redis_client.keys('rate_limit:plain:*')) > 60
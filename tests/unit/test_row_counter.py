@@ -0,0 +1,68 @@
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError
+from sqlalchemy import Column, Integer, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from core.constants import COUNT_STRATEGY
+from services.cache import RedisCache
+from services.row_counter import RowCounter, RowsCount
+
+Base = declarative_base()
+
+
+class Record(Base):
+    __tablename__ = 'records'
+
+    id = Column(Integer, primary_key=True)
+    group = Column(Integer, nullable=False)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add_all(Record(id=i, group=i % 3) for i in range(30))
+        session.commit()
+        yield session
+
+
+@pytest.fixture
+def cache() -> RedisCache:
+    return RedisCache(fakeredis.FakeRedis(decode_responses=True))
+
+
+def test_cached_count_is_reused_per_query(session, cache: RedisCache):
+    counter = RowCounter(cache)
+    query = session.query(Record).where(Record.group == 0)
+
+    assert counter.count(query, COUNT_STRATEGY.cached) == RowsCount(10, COUNT_STRATEGY.exact)
+    session.add(Record(id=100, group=0))
+    session.flush()
+
+    # до истечения времени хранения выдаётся сохранённое значение
+    assert counter.count(query, COUNT_STRATEGY.cached) == RowsCount(10, COUNT_STRATEGY.cached)
+    # запрос с другими параметрами считается отдельно
+    other_query = session.query(Record).where(Record.group == 1)
+    assert counter.count(other_query, COUNT_STRATEGY.cached) == RowsCount(10, COUNT_STRATEGY.exact)
+
+    cache.clear('rows_count:')
+    assert counter.count(query, COUNT_STRATEGY.cached) == RowsCount(11, COUNT_STRATEGY.exact)
+
+
+def test_cached_count_without_redis(session, cache: RedisCache, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise ConnectionError('Redis is down')
+
+    monkeypatch.setattr(cache.client, 'get', unavailable)
+
+    assert RowCounter(cache).count(session.query(Record), COUNT_STRATEGY.cached) == (30, COUNT_STRATEGY.exact)
+
+
+def test_estimate_falls_back_to_exact_count(session):
+    # оценка планировщика доступна только в PostgreSQL
+    result = RowCounter().count(session.query(Record), COUNT_STRATEGY.estimated)
+
+    assert result == RowsCount(30, COUNT_STRATEGY.exact)